@@ -0,0 +1,88 @@
+# FILE: MinePhone/backend/app/archive.py
+# Lưu trữ (archive) đơn hàng cũ để bảng orders luôn nhỏ.
+#
+# - Đơn "completed"/"cancelled" tạo trước N ngày được chuyển sang archive.archived_orders
+#   (file SQLite riêng, ATTACH trong database.py) và xóa khỏi orders.
+# - Cùng transaction đó cộng dồn vào archive.order_rollups (theo tháng + trạng thái)
+#   -> dashboard cộng số liệu live + rollup, vẫn chính xác tuyệt đối.
+# - Chuyển + xóa + cộng rollup nằm chung 1 transaction SQLite: hoặc xong hết, hoặc không gì cả.
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Trạng thái cuối cùng, không còn bị sửa -> an toàn để lưu trữ
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+# Không lưu trữ đơn vừa tạo (older_than_days=0 sẽ chuyển cả đơn vừa xong trong hôm nay)
+MIN_ARCHIVE_AGE_DAYS = 1
+
+
+def archive_orders(db: Session, older_than_days: int, batch_size: int = 500) -> int:
+    """
+    Chuyển các đơn đã kết thúc cũ hơn older_than_days sang archive. Trả về số đơn đã chuyển.
+    Raise ValueError nếu older_than_days < MIN_ARCHIVE_AGE_DAYS.
+    """
+    if older_than_days < MIN_ARCHIVE_AGE_DAYS:
+        raise ValueError(f"Chỉ lưu trữ đơn cũ hơn ít nhất {MIN_ARCHIVE_AGE_DAYS} ngày")
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived = 0
+
+    while True:
+        rows = db.execute(
+            select(
+                models.Order.id, models.Order.user_id, models.User.username,
+                models.Order.total, models.Order.items, models.Order.status, models.Order.created_at,
+            )
+            .select_from(models.Order)
+            .outerjoin(models.User, models.Order.user_id == models.User.id)
+            .where(models.Order.status.in_(ARCHIVABLE_STATUSES), models.Order.created_at < cutoff)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        now = datetime.utcnow()
+        db.execute(insert(models.ArchivedOrder), [
+            {
+                "id": r.id, "user_id": r.user_id, "username": r.username, "total": r.total,
+                "items": r.items, "status": r.status, "created_at": r.created_at, "archived_at": now,
+            }
+            for r in rows
+        ])
+
+        # Gom theo (tháng, trạng thái) rồi cộng dồn vào rollup
+        rollups = {}
+        for r in rows:
+            key = (r.created_at.strftime("%Y-%m"), r.status)
+            count, total = rollups.get(key, (0, 0.0))
+            rollups[key] = (count + 1, total + (r.total or 0))
+        stmt = sqlite_insert(models.OrderRollup).values([
+            {"month": month, "status": status, "order_count": count, "total_sum": total}
+            for (month, status), (count, total) in rollups.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["month", "status"],
+            set_={
+                "order_count": models.OrderRollup.order_count + stmt.excluded.order_count,
+                "total_sum": models.OrderRollup.total_sum + stmt.excluded.total_sum,
+            },
+        ))
+
+        db.execute(delete(models.Order).where(models.Order.id.in_([r.id for r in rows])))
+        db.commit()
+        archived += len(rows)
+
+    return archived
+
+
+def archived_totals(db: Session) -> Tuple[float, int]:
+    """(Doanh thu đơn completed đã lưu trữ, tổng số đơn đã lưu trữ) lấy từ bảng rollup."""
+    revenue = db.execute(
+        select(func.sum(models.OrderRollup.total_sum)).where(models.OrderRollup.status == "completed")
+    ).scalar() or 0
+    count = db.execute(select(func.sum(models.OrderRollup.order_count))).scalar() or 0
+    return revenue, count
@@ -0,0 +1,153 @@
+# FILE: MinePhone/backend/app/chat_sessions.py
+# Lưu hội thoại chatbot phía server theo session_id.
+#
+# Client chỉ gửi tin nhắn mới + session_id. Server tự ghép lịch sử gần nhất
+# sao cho vừa ngân sách token (CHAT_HISTORY_TOKEN_BUDGET). Các lượt cũ bị đẩy
+# ra khỏi cửa sổ được rút gọn thành 1 đoạn tóm tắt ngắn (cũng có giới hạn token, 0 = tắt)
+# -> prompt không còn phình to theo số lượt chat.
+#
+# Mặc định (200 + 80 token) ≈ lượt hỏi-đáp gần nhất + 1-2 dòng tóm tắt: tốn ít prompt token
+# hơn client cũ (gửi 3 tin gần nhất), xem scripts/bench_chat_tokens.py.
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, List, Optional, Tuple
+
+# Độ dài tối đa (ký tự) của 1 lượt khi đưa vào phần tóm tắt
+SUMMARY_SNIPPET_CHARS = 120
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Ước lượng số token (~4 ký tự / token, cộng 4 token overhead cho mỗi message).
+    Không cần tokenizer của từng model, đủ chính xác để chia ngân sách.
+    """
+    return math.ceil(len(text) / 4) + 4
+
+
+@dataclass
+class ChatSession:
+    id: str
+    turns: Deque[Tuple[str, str]] = field(default_factory=deque)  # (role, content)
+    summary: str = ""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+    last_active: float = 0.0
+
+    def usage(self) -> dict:
+        return {
+            "session_id": self.id,
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+        }
+
+
+class ChatSessionStore:
+    def __init__(
+        self,
+        history_token_budget: int = 200,
+        summary_token_budget: int = 80,
+        max_sessions: int = 1000,
+        idle_ttl: float = 3600,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.history_token_budget = history_token_budget
+        self.summary_token_budget = summary_token_budget
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()  # LRU: cũ nhất ở đầu
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        with self._lock:
+            now = self._clock()
+            # Dọn session hết hạn / vượt quá số lượng (từ đầu LRU)
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if len(self._sessions) < self.max_sessions and now - oldest.last_active < self.idle_ttl:
+                    break
+                self._sessions.popitem(last=False)
+
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = ChatSession(id=session_id or uuid.uuid4().hex)
+                self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            session.last_active = now
+            return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def build_messages(self, session: ChatSession, system_prompt: str, message: str) -> List[dict]:
+        """
+        Ghép messages gửi cho LLM: system + tóm tắt lượt cũ + các lượt gần nhất (vừa ngân sách)
+        + tin nhắn mới. Lượt nào không còn vừa cửa sổ sẽ bị gộp vào tóm tắt và xóa khỏi session.
+        """
+        with self._lock:
+            budget = self.history_token_budget - estimate_tokens(message)
+            kept: List[Tuple[str, str]] = []
+            used = 0
+            for role, content in reversed(session.turns):
+                cost = estimate_tokens(content)
+                if used + cost > budget:
+                    break
+                kept.append((role, content))
+                used += cost
+            kept.reverse()
+
+            dropped = len(session.turns) - len(kept)
+            for _ in range(dropped):
+                self._fold_into_summary(session, *session.turns.popleft())
+
+            messages = [{"role": "system", "content": system_prompt}]
+            if session.summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Tóm tắt các lượt chat trước đó:\n{session.summary}",
+                })
+            messages.extend({"role": role, "content": content} for role, content in kept)
+            messages.append({"role": "user", "content": message})
+            return messages
+
+    def _fold_into_summary(self, session: ChatSession, role: str, content: str) -> None:
+        if self.summary_token_budget <= 0:
+            return  # Tắt tóm tắt: lượt cũ bị bỏ hẳn
+        who = "Khách" if role == "user" else "Trợ lý"
+        snippet = " ".join(content.split())
+        if len(snippet) > SUMMARY_SNIPPET_CHARS:
+            snippet = snippet[:SUMMARY_SNIPPET_CHARS] + "..."
+        lines = (session.summary.splitlines() if session.summary else []) + [f"- {who}: {snippet}"]
+        # Tóm tắt cũng có ngân sách riêng: bỏ các dòng cũ nhất khi vượt
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_token_budget:
+            lines.pop(0)
+        session.summary = "\n".join(lines)
+
+    def record_turn(
+        self,
+        session: ChatSession,
+        message: str,
+        reply: str,
+        messages: List[dict],
+        usage=None,
+    ) -> None:
+        """Lưu lượt chat vừa xong và cộng dồn token (ưu tiên số liệu usage thật từ API)."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        reply = reply or ""
+        with self._lock:
+            session.turns.append(("user", message))
+            session.turns.append(("assistant", reply))
+            session.requests += 1
+            session.prompt_tokens += prompt_tokens if prompt_tokens is not None \
+                else sum(estimate_tokens(m["content"]) for m in messages)
+            session.completion_tokens += completion_tokens if completion_tokens is not None \
+                else estimate_tokens(reply)
@@ -0,0 +1,121 @@
+# FILE: MinePhone/backend/app/compression.py
+# Middleware nén response (brotli / gzip) theo header Accept-Encoding của client.
+# Viết dạng ASGI thuần để dùng được cả trong script benchmark (không cần FastAPI).
+import gzip
+from typing import Optional
+
+try:
+    import brotli  # Tùy chọn: cài thêm gói "brotli" để bật nén br
+except ImportError:
+    brotli = None
+
+# Chỉ nén dữ liệu dạng text (ảnh jpg/png đã nén sẵn, nén lại chỉ tốn CPU)
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """'gzip, br;q=0.8, *;q=0' -> {'gzip': 1.0, 'br': 0.8, '*': 0.0}"""
+    result = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        result[token] = q
+    return result
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Chọn thuật toán tốt nhất mà client chấp nhận: ưu tiên br, sau đó gzip."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """
+    Nén body của response khi:
+    - Client gửi Accept-Encoding có br/gzip
+    - Content-Type thuộc COMPRESSIBLE_TYPES và chưa có Content-Encoding
+    - Kích thước body >= minimum_size (body nhỏ nén xong còn to hơn, không đáng)
+    """
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                resp_headers = dict(message.get("headers") or [])
+                content_type = resp_headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in resp_headers or not content_type.startswith(COMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Giữ lại header, chờ đủ body mới quyết định có nén hay không
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            resp_headers, vary = [], [b"Accept-Encoding"]
+            for k, v in start_message.get("headers", []):
+                if k.lower() == b"vary":
+                    vary.insert(0, v)  # Giữ Vary cũ (vd: Origin của CORS)
+                elif k.lower() != b"content-length":
+                    resp_headers.append((k, v))
+            resp_headers.append((b"vary", b", ".join(vary)))
+            if len(body) >= self.minimum_size:
+                body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                resp_headers.append((b"content-encoding", encoding.encode("latin-1")))
+            resp_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+            await send({**start_message, "headers": resp_headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
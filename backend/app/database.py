@@ -1,16 +1,29 @@
 # FILE: MinePhone/backend/app/database.py
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base # Updated import cho bản mới
 
 # Sửa đường dẫn để trỏ vào thư mục data (nơi được mount volume)
 # Nếu folder data chưa có thì code sẽ lỗi, nên docker-compose đã lo việc mount này
-SQLALCHEMY_DATABASE_URL = "sqlite:///./data/minephone.db"
+# Có thể đổi qua biến môi trường DATABASE_URL (docker-compose, script kiểm tra dùng DB tạm...)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/minephone.db")
 
 # check_same_thread=False cần thiết cho SQLite
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+# Kho lưu trữ đơn hàng cũ: file SQLite riêng, ATTACH vào mọi connection với tên "archive".
+# Nhờ vậy chuyển đơn sang archive + xóa khỏi bảng orders nằm chung 1 transaction,
+# và GET /orders có thể UNION ALL lịch sử cũ trong 1 câu query.
+ARCHIVE_DATABASE_PATH = os.getenv("ARCHIVE_DATABASE_PATH", "./data/orders_archive.db")
+
+@event.listens_for(engine, "connect")
+def attach_archive(dbapi_connection, connection_record):
+    dbapi_connection.execute("ATTACH DATABASE ? AS archive", (ARCHIVE_DATABASE_PATH,))
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+# Base riêng cho các bảng nằm trong DB archive (schema "archive"),
+# tách khỏi Base để create_all trên engine khác (test, benchmark) không đòi ATTACH
+ArchiveBase = declarative_base()
\ No newline at end of file
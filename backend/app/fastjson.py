@@ -0,0 +1,14 @@
+# FILE: MinePhone/backend/app/fastjson.py
+# Encode thẳng các row (tuple) sang JSON bytes bằng orjson.
+# Dùng cho API danh sách chỉ đọc: không tạo ORM object, không qua pydantic.
+from typing import Iterable, Sequence
+
+import orjson
+
+
+def dumps_rows(keys: Sequence[str], rows: Iterable[Sequence]) -> bytes:
+    """
+    Ghép từng row với danh sách key rồi encode 1 lần ra bytes.
+    orjson tự xử lý datetime (ISO 8601) và các cột JSON (list/dict) giống pydantic.
+    """
+    return orjson.dumps([dict(zip(keys, row)) for row in rows])
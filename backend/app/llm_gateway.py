@@ -0,0 +1,235 @@
+# FILE: MinePhone/backend/app/llm_gateway.py
+# Cổng gọi LLM (OpenRouter) có khả năng chịu lỗi:
+#   - Deadline cho từng lần gọi (không chờ timeout mặc định của SDK)
+#   - Circuit breaker theo từng model: model lỗi liên tục thì tạm bỏ qua
+#   - Fallback / hedging qua danh sách model: model chính chậm quá hedge_delay
+#     hoặc lỗi thì bắn thêm request sang model kế tiếp, ai trả về trước thì dùng
+#   - Token bucket giới hạn tổng số request/giây ra ngoài
+#   - Gộp request giống hệt nhau đang chạy (request coalescing)
+#   - Chờ token bucket tính vào deadline; còn ít hơn min_call_time thì bỏ, không gọi model.
+#     Lời gọi bị timeout vì deadline cắt ngắn (được ít hơn hedge_delay giây) không tính là
+#     lỗi của model -> xếp hàng lúc tải cao không làm mở breaker của model đang khỏe.
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+try:
+    from openai import APITimeoutError
+except ImportError:  # Gateway không bắt buộc dùng client của openai
+    APITimeoutError = TimeoutError
+
+TIMEOUT_ERRORS = (TimeoutError, APITimeoutError)
+
+class LLMUnavailable(Exception):
+    """Không model nào trả lời được trong deadline (hoặc bị rate limit / breaker chặn)."""
+
+
+class TokenBucket:
+    """Cho phép trung bình `rate` request/giây, dồn tối đa `capacity` request."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: float) -> bool:
+        """Chờ tối đa `timeout` giây để lấy 1 token."""
+        deadline = self._clock() + timeout
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_for = (1 - self._tokens) / self.rate
+            if now + wait_for > deadline:
+                return False
+            time.sleep(wait_for)
+
+
+class CircuitBreaker:
+    """
+    closed    : gọi bình thường, đếm lỗi liên tiếp
+    open      : lỗi >= failure_threshold -> chặn mọi lời gọi trong reset_timeout giây
+    half_open : hết reset_timeout -> cho đúng 1 lời gọi thử; thành công thì đóng lại
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self._clock() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                return True
+            return False  # open, hoặc half_open đang có 1 lời gọi thử
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_skipped(self) -> None:
+        """Lời gọi không đánh giá được model (vd: timeout vì deadline quá ngắn)."""
+        with self._lock:
+            if self.state == "half_open":
+                # Trả lại open với _opened_at cũ -> lần allow() sau được thử lại ngay
+                self.state = "open"
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = self._clock()
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        client,
+        models: List[str],
+        timeout: float = 20,
+        hedge_delay: float = 5,
+        rate_limiter: Optional[TokenBucket] = None,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30,
+        max_workers: int = 16,
+        min_call_time: float = 0.5,
+    ):
+        if not models:
+            raise ValueError("Cần ít nhất 1 model")
+        self.client = client
+        self.models = models
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.rate_limiter = rate_limiter
+        self.min_call_time = min_call_time
+        self.breakers = {m: CircuitBreaker(failure_threshold, reset_timeout) for m in models}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def complete(self, messages: List[dict]):
+        """
+        Trả về completion của model nhanh nhất trong danh sách.
+        Request giống hệt đang chạy thì chờ chung kết quả thay vì gọi thêm lần nữa.
+        """
+        key = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        with self._inflight_lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                future = self._inflight[key] = Future()
+        if leader is not None:
+            return leader.result(timeout=self.timeout)
+
+        try:
+            result = self._complete(messages)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _call(self, model: str, messages: List[dict], timeout: float):
+        return self.client.with_options(timeout=timeout, max_retries=0)\
+            .chat.completions.create(model=model, messages=messages)
+
+    def _complete(self, messages: List[dict]):
+        deadline = time.monotonic() + self.timeout
+        # Thời gian chờ token nằm trong deadline, chừa lại ít nhất min_call_time để gọi model
+        if self.rate_limiter and not self.rate_limiter.acquire(
+                timeout=deadline - time.monotonic() - self.min_call_time):
+            raise LLMUnavailable("Vượt giới hạn request tới LLM")
+
+        candidates = iter(self.models)
+        pending: Dict[Future, str] = {}
+        errors = []
+
+        def launch_next(first: bool = False) -> bool:
+            """Bắn request tới model kế tiếp còn được breaker cho phép."""
+            if deadline - time.monotonic() < self.min_call_time:
+                return False  # Không đủ thời gian cho 1 lời gọi có ý nghĩa
+            # Request đầu đã lấy token ở trên; hedge/fallback phải lấy thêm token (không chờ)
+            if not first and self.rate_limiter and not self.rate_limiter.try_acquire():
+                return False
+            for model in candidates:
+                if self.breakers[model].allow():
+                    remaining = deadline - time.monotonic()
+                    f = self._executor.submit(self._call, model, messages, remaining)
+                    # Ghi nhận kết quả cho breaker cả khi request bị bỏ lại (hedge thua / quá deadline)
+                    f.add_done_callback(lambda f, m=model, t=remaining: self._record(m, f, t))
+                    pending[f] = model
+                    return True
+            return False
+
+        if not launch_next(first=True):
+            raise LLMUnavailable("Tất cả model đang bị ngắt (circuit open) hoặc hết thời gian chờ")
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=min(self.hedge_delay, remaining), return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Model đang chạy quá hedge_delay -> bắn thêm (hedge) sang model kế tiếp
+                launch_next()
+                continue
+
+            for f in done:
+                model = pending.pop(f)
+                if f.exception() is not None:
+                    errors.append(f"{model}: {f.exception()}")
+                    continue
+                return f.result()
+
+            # Tất cả request vừa xong đều lỗi -> fallback ngay sang model kế tiếp
+            if not pending:
+                launch_next()
+
+        raise LLMUnavailable("; ".join(errors) or f"Quá thời gian {self.timeout}s")
+
+    def _record(self, model: str, future: Future, call_timeout: float) -> None:
+        error = future.exception()
+        if error is None:
+            self.breakers[model].record_success()
+        elif isinstance(error, TIMEOUT_ERRORS) and call_timeout < self.hedge_delay:
+            # Bị deadline cắt còn ít hơn độ trễ "bình thường" -> không kết luận model lỗi
+            self.breakers[model].record_skipped()
+        else:
+            self.breakers[model].record_failure()
+
+    def status(self) -> dict:
+        return {model: breaker.state for model, breaker in self.breakers.items()}
@@ -6,7 +6,7 @@ from datetime import datetime
 
 from openai import OpenAI
 from pydantic import BaseModel
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
@@ -14,7 +14,13 @@ from passlib.context import CryptContext
 from sqlalchemy import func
 
 # Import nội bộ
-from . import models, schemas
+from . import models, schemas, queries, archive
+from .fastjson import dumps_rows
+from .compression import CompressionMiddleware
+from .reservations import ReservationStore, ReservationError
+from .chat_sessions import ChatSessionStore
+from .llm_gateway import LLMGateway, TokenBucket
+from .migrations import run_migrations
 from .database import SessionLocal, engine
 
 # ---------------------------------------------------------
@@ -23,6 +29,9 @@ from .database import SessionLocal, engine
 
 # Tạo bảng trong Database nếu chưa có
 models.Base.metadata.create_all(bind=engine)
+models.ArchiveBase.metadata.create_all(bind=engine) # Bảng trong DB archive (đã ATTACH)
+# Bổ sung index... cho DB đã tạo từ phiên bản cũ
+run_migrations(engine)
 
 app = FastAPI(
     title="MinePhone API",
@@ -38,6 +47,13 @@ origins = [
     "*"  # Trong môi trường dev, cho phép tất cả để tránh lỗi
 ]
 
+# Nén response (br/gzip) cho JSON/text lớn hơn ngưỡng COMPRESS_MIN_SIZE (bytes)
+# Add trước CORS để CORS là lớp ngoài cùng, header CORS không bị ảnh hưởng
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESS_MIN_SIZE", "500")),
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -55,6 +71,14 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 # Lưu ý: Yêu cầu bcrypt==4.0.1 trong requirements.txt để tránh lỗi "password > 72 bytes"
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Giữ hàng tạm cho giỏ hàng (TTL tính bằng giây, mặc định 10 phút).
+# Mỗi dòng giỏ giữ tối đa CART_HOLD_MAX_QTY chiếc, 1 hold sống tối đa CART_HOLD_MAX_LIFETIME giây dù được gia hạn
+reservations = ReservationStore(
+    ttl_seconds=int(os.getenv("CART_HOLD_TTL", "600")),
+    max_qty_per_line=int(os.getenv("CART_HOLD_MAX_QTY", "5")),
+    max_lifetime=int(os.getenv("CART_HOLD_MAX_LIFETIME", "1800")),
+)
+
 # ---------------------------------------------------------
 # 2. CÁC HÀM TIỆN ÍCH (DEPENDENCIES & UTILS)
 # ---------------------------------------------------------
@@ -169,37 +193,24 @@ def get_products(
     sort_by: Optional[str] = None, # values: newest, price_asc, price_desc
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = None, # Sparse fieldset, vd: id,name,price,image
     db: Session = Depends(get_db)
 ):
-    # Base query: Chỉ lấy sản phẩm đang hoạt động (chưa bị xóa mềm)
-    q = db.query(models.Product).filter(models.Product.is_active == True)
-    
-    # 1. Lọc theo Thương hiệu
-    if brand and brand != 'All':
-        q = q.filter(models.Product.brand == brand)
-        
-    # 2. Tìm kiếm theo tên (Case insensitive)
-    if search:
-        q = q.filter(models.Product.name.ilike(f"%{search}%"))
-        
-    # 3. Lọc theo khoảng giá
-    if min_price is not None:
-        q = q.filter(models.Product.price >= min_price)
-    if max_price is not None:
-        q = q.filter(models.Product.price <= max_price)
-        
-    # 4. Sắp xếp
-    if sort_by == 'price_asc':
-        q = q.order_by(models.Product.price.asc())
-    elif sort_by == 'price_desc':
-        q = q.order_by(models.Product.price.desc())
-    else:
-        # Mặc định sắp xếp mới nhất (ID giảm dần)
-        q = q.order_by(models.Product.id.desc())
-        
-    # 5. Phân trang
-    products = q.offset(skip).limit(limit).all()
-    return products
+    try:
+        columns = queries.pick_fields(queries.PRODUCT_FIELDS, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Fast path: query theo cột (tuple) + orjson, bỏ qua ORM & pydantic.
+    # Logic lọc/sắp xếp/phân trang nằm trong queries.products_list_stmt.
+    # response_model vẫn giữ để sinh tài liệu OpenAPI, contract JSON không đổi.
+    stmt = queries.products_list_stmt(
+        brand=brand, search=search,
+        min_price=min_price, max_price=max_price,
+        sort_by=sort_by, skip=skip, limit=limit, columns=columns
+    )
+    rows = db.execute(stmt).all()
+    return Response(content=dumps_rows(list(columns), rows), media_type="application/json")
 
 @app.get("/products/{product_id}", response_model=schemas.Product)
 def get_product_detail(product_id: int, db: Session = Depends(get_db)):
@@ -336,13 +347,10 @@ def chat_with_ai(chat_req: ChatRequest, db: Session = Depends(get_db)):
         full_system_prompt = f"{SYSTEM_PROMPT}\n\nDỮ LIỆU SẢN PHẨM CỦA CỬA HÀNG:\n{product_context}"
 
         # 4. Gọi OpenRouter
-        completion = client.chat.completions.create(
-            model=AI_MODEL,
-            messages=[
-                {"role": "system", "content": full_system_prompt},
-                {"role": "user", "content": chat_req.message}
-            ]
-        )
+        completion = llm.complete([
+            {"role": "system", "content": full_system_prompt},
+            {"role": "user", "content": chat_req.message}
+        ])
         
         # 5. Trả về câu trả lời
         return {"reply": completion.choices[0].message.content}
@@ -368,11 +376,15 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
         if not product:
             raise HTTPException(status_code=404, detail=f"Sản phẩm ID {item.id} không tồn tại")
         
-        if product.quantity < item.qty:
-            raise HTTPException(status_code=400, detail=f"Sản phẩm '{product.name}' chỉ còn {product.quantity} chiếc.")
+        # Hàng đang được giỏ khác giữ thì không bán cho đơn này
+        def held_by_others(product_id=product.id):
+            return reservations.reserved_by_others(product_id, order.cart_id)
         
-        # Trừ kho
-        product.quantity -= item.qty
+        # Trừ kho nguyên tử (kiểm tra đủ hàng ngay trong câu UPDATE), không đọc-sửa-ghi
+        if not queries.decrement_stock(db, product.id, item.qty, held_by_others):
+            db.rollback() # Hoàn lại phần kho đã trừ của các sản phẩm trước trong đơn
+            available = product.quantity - held_by_others() # product đã bị expire -> đọc lại số mới
+            raise HTTPException(status_code=400, detail=f"Sản phẩm '{product.name}' chỉ còn {max(available, 0)} chiếc.")
         
         # Tính lại tổng tiền (Backend nên tự tính để bảo mật, không tin tưởng total từ frontend gửi lên hoàn toàn)
         # Tuy nhiên để đơn giản theo Sprint 2 hiện tại, ta vẫn dùng logic cũ nhưng lưu structure đúng
@@ -390,6 +402,10 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
     db.add(new_order)
     db.commit()
     db.refresh(new_order)
+
+    # Đã trừ kho thật -> bỏ giữ hàng của giỏ
+    if order.cart_id:
+        reservations.release_cart(order.cart_id)
     
     # --- FIX QUAN TRỌNG: Trả về đối tượng new_order để lấy được ID ---
     return {
@@ -400,39 +416,74 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
         "created_at": new_order.created_at
     }
 
+# --- GIỮ HÀNG KHI THÊM VÀO GIỎ ---
+
+@app.post("/cart/reserve")
+def reserve_stock(req: schemas.ReserveReq, db: Session = Depends(get_db)):
+    """
+    Giữ hàng tạm (TTL) cho 1 dòng trong giỏ. qty là tổng số lượng của dòng đó.
+    Chỉ đọc tồn kho từ DB, hold lưu trong RAM nên không tạo lock ghi.
+    qty <= 0 là bỏ giữ.
+    """
+    if req.qty <= 0:
+        # Bỏ giữ không cần tra sản phẩm: sản phẩm có thể đã bị ẩn khi vẫn nằm trong giỏ
+        reservations.release_cart(req.cart_id, [req.product_id])
+        return {"product_id": req.product_id, "qty": 0, "expires_in": 0}
+
+    product = db.query(models.Product.id)\
+        .filter(models.Product.id == req.product_id, models.Product.is_active == True).first()
+    if not product:
+        raise HTTPException(status_code=404, detail=f"Sản phẩm ID {req.product_id} không tồn tại")
+
+    def current_stock():
+        return db.query(models.Product.quantity).filter(models.Product.id == req.product_id).scalar() or 0
+
+    try:
+        hold = reservations.reserve(req.cart_id, req.product_id, req.qty, current_stock)
+    except ReservationError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {
+        "product_id": req.product_id,
+        "qty": hold.qty,
+        "expires_in": reservations.ttl_seconds
+    }
+
+@app.delete("/cart/{cart_id}/reserve")
+def release_cart_stock(cart_id: str):
+    """Bỏ giữ toàn bộ hàng của giỏ (khi khách xóa giỏ)."""
+    released = reservations.release_cart(cart_id)
+    return {"message": f"Đã bỏ giữ {released} sản phẩm"}
+
 # FILE: MinePhone/backend/app/main.py (Cập nhật hàm get_orders)
 
 @app.get("/orders")
-def get_orders(user_id: Optional[int] = None, db: Session = Depends(get_db)):
+def get_orders(
+    user_id: Optional[int] = None,
+    fields: Optional[str] = None,
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
     """
     Lấy danh sách đơn hàng kèm theo tên người dùng.
+    fields: chỉ lấy một số cột (vd: id,total,status) để giảm dung lượng trả về.
+    include_archived: gộp thêm các đơn cũ đã được lưu trữ (archive).
     """
-    # Join bảng Order với User để lấy username
-    # Query trả về Tuple: (Order Object, username string)
-    query = db.query(models.Order, models.User.username)\
-        .join(models.User, models.Order.user_id == models.User.id)
-    
-    if user_id:
-        query = query.filter(models.Order.user_id == user_id)
-        
-    # Sắp xếp mới nhất lên đầu
-    results = query.order_by(models.Order.id.desc()).all()
-    
-    # Map dữ liệu trả về client (kết hợp Order + username)
-    response = []
-    for order, username in results:
-        order_dict = {
-            "id": order.id,
-            "user_id": order.user_id,
-            "username": username, # <--- Dữ liệu mới thêm
-            "total": order.total,
-            "status": order.status,
-            "created_at": order.created_at,
-            "items": order.items # Danh sách sản phẩm
-        }
-        response.append(order_dict)
-        
-    return response
+    try:
+        columns = queries.pick_fields(queries.ORDER_FIELDS, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if include_archived:
+        # Đơn cũ nằm ở archive: UNION ALL 2 nguồn, bỏ cột _sort_id ở cuối mỗi dòng
+        rows = db.execute(queries.orders_with_archive_stmt(user_id, columns)).all()
+        return Response(content=dumps_rows(list(columns), (r[:-1] for r in rows)), media_type="application/json")
+
+    # Join bảng Order với User để lấy username, lấy thẳng tuple theo cột
+    # rồi encode bằng orjson (không tạo dict/ORM object cho từng dòng)
+    rows = db.execute(queries.orders_list_stmt(user_id, columns)).all()
+    return Response(content=dumps_rows(list(columns), rows), media_type="application/json")
+
 @app.patch("/orders/{order_id}/status")
 def update_order_status(order_id: int, status: str, db: Session = Depends(get_db)):
     """API dành cho Admin cập nhật trạng thái đơn (pending -> shipping -> completed)"""
@@ -455,7 +506,7 @@ def update_order_status(order_id: int, status: str, db: Session = Depends(get_db
 # ---------------------------------------------------------
 # --- SETUP OPENROUTER CLIENT (Đảm bảo đoạn này ở trên endpoint chat) ---
 client = OpenAI(
-    base_url="https://openrouter.ai/api/v1",
+    base_url=os.getenv("BASE_URL_CHATBOT", "https://openrouter.ai/api/v1"),
     api_key=os.getenv("OPENROUTER_API_KEY"),
 )
 
@@ -463,6 +514,32 @@ client = OpenAI(
 SYSTEM_PROMPT = os.getenv("CHATBOT_PROMPT", "Bạn là nhân viên tư vấn của MinePhone. Hãy trả lời ngắn gọn, thân thiện bằng tiếng Việt.")
 AI_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-2.0-flash-exp:free") # Hoặc model bạn thích
 
+# Danh sách model theo thứ tự ưu tiên (phân cách bởi dấu phẩy), model đầu tiên là chính.
+# Không khai báo thì chỉ dùng AI_MODEL.
+AI_MODELS = [m.strip() for m in os.getenv("OPENROUTER_MODELS", "").split(",") if m.strip()] or [AI_MODEL]
+
+# Gateway gọi LLM: deadline mỗi request, hedge sang model dự phòng khi model chính chậm,
+# circuit breaker theo model và giới hạn tổng số request/giây (token bucket)
+llm = LLMGateway(
+    client,
+    models=AI_MODELS,
+    timeout=float(os.getenv("LLM_TIMEOUT", "20")),
+    hedge_delay=float(os.getenv("LLM_HEDGE_DELAY", "6")),
+    rate_limiter=TokenBucket(
+        rate=float(os.getenv("LLM_RATE_LIMIT", "2")),
+        capacity=float(os.getenv("LLM_BURST", "5")),
+    ),
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "3")),
+    reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+)
+
+# Lịch sử chat lưu phía server, chỉ gửi cho AI phần vừa ngân sách token
+chat_sessions = ChatSessionStore(
+    history_token_budget=int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "200")),
+    summary_token_budget=int(os.getenv("CHAT_SUMMARY_TOKEN_BUDGET", "80")),
+    idle_ttl=int(os.getenv("CHAT_SESSION_TTL", "3600")),
+)
+
 # # --- ĐÂY LÀ ENDPOINT CHÍNH THỨC (Gộp logic AI thật vào đường dẫn /ai/chat) ---
 # @app.post("/ai/chat")
 # def ai_chat(req: schemas.ChatReq, db: Session = Depends(get_db)):
@@ -523,6 +600,7 @@ AI_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemini-2.0-flash-exp:free") # H
 
 @app.post("/ai/chat")
 def ai_chat(req: schemas.ChatReq, db: Session = Depends(get_db)):
+    session = chat_sessions.get_or_create(req.session_id)
     try:
         # Lấy dữ liệu sản phẩm làm kiến thức nền
         products = db.query(models.Product).filter(models.Product.is_active == True).all()
@@ -548,45 +626,39 @@ def ai_chat(req: schemas.ChatReq, db: Session = Depends(get_db)):
             "4. KHÔNG trả về JSON raw (như {'message':...}). Chỉ trả về text hoặc mã @@PRODUCT@@."
         )
 
-        # Gọi AI (OpenRouter)
-        completion = client.chat.completions.create(
-            model=AI_MODEL,
-            messages=[
-                {"role": "system", "content": system_instruction},
-                {"role": "user", "content": req.message} # Frontend đã gửi cả history trong message này
-            ]
-        )
+        # Ghép lịch sử từ session (đã cắt/tóm tắt cho vừa ngân sách token) + tin nhắn mới
+        messages = chat_sessions.build_messages(session, system_instruction, req.message)
+
+        # Gọi AI (OpenRouter) qua gateway: có deadline, fallback model, circuit breaker
+        completion = llm.complete(messages)
         
         reply_content = completion.choices[0].message.content
-        return {"reply": reply_content}
+        chat_sessions.record_turn(session, req.message, reply_content, messages, completion.usage)
+        return {"reply": reply_content, "session_id": session.id}
 
     except Exception as e:
         print(f"Lỗi AI: {e}")
-        return {"reply": "Dạ hiện tại em đang bị quá tải, anh/chị chờ em chút xíu nhé!"}
+        return {"reply": "Dạ hiện tại em đang bị quá tải, anh/chị chờ em chút xíu nhé!", "session_id": session.id}
+
+@app.get("/ai/status")
+def ai_status():
+    """Trạng thái circuit breaker của từng model (closed / open / half_open)."""
+    return {"models": llm.status()}
+
+@app.get("/ai/chat/{session_id}/usage")
+def ai_chat_usage(session_id: str):
+    """Thống kê token đã dùng của 1 phiên chat."""
+    session = chat_sessions.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Không tìm thấy phiên chat")
+    return session.usage()
 
 # --- API REVIEWS (MỚI) ---
 @app.get("/products/{product_id}/reviews", response_model=List[schemas.ReviewResponse])
 def get_product_reviews(product_id: int, db: Session = Depends(get_db)):
-    # Join bảng Review với User để lấy username
-    results = db.query(models.Review, models.User.username)\
-        .join(models.User, models.Review.user_id == models.User.id)\
-        .filter(models.Review.product_id == product_id)\
-        .order_by(models.Review.created_at.desc()).all()
-    
-    response = []
-    for review, username in results:
-        # Convert sang schema response
-        r = schemas.ReviewResponse(
-            id=review.id,
-            user_id=review.user_id,
-            product_id=review.product_id,
-            rating=review.rating,
-            comment=review.comment,
-            created_at=review.created_at,
-            username=username
-        )
-        response.append(r)
-    return response
+    # Join bảng Review với User để lấy username (tuple theo cột + orjson)
+    rows = db.execute(queries.reviews_list_stmt(product_id)).all()
+    return Response(content=dumps_rows(list(queries.REVIEW_FIELDS), rows), media_type="application/json")
 
 @app.post("/reviews", response_model=schemas.ReviewResponse)
 def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
@@ -617,12 +689,15 @@ def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db)):
 # --- API DASHBOARD (MỚI) ---
 @app.get("/admin/stats")
 def get_dashboard_stats(db: Session = Depends(get_db)):
+    # Số liệu của các đơn đã lưu trữ (lấy từ bảng rollup, không phải đọc lại từng đơn)
+    archived_revenue, archived_orders = archive.archived_totals(db)
+
     # 1. Tổng doanh thu (chỉ tính đơn completed)
-    total_revenue = db.query(func.sum(models.Order.total))\
-        .filter(models.Order.status == "completed").scalar() or 0
+    total_revenue = (db.query(func.sum(models.Order.total))\
+        .filter(models.Order.status == "completed").scalar() or 0) + archived_revenue
         
     # 2. Tổng số đơn hàng
-    total_orders = db.query(models.Order).count()
+    total_orders = db.query(models.Order).count() + archived_orders
     
     # 3. Tổng sản phẩm tồn kho
     total_products = db.query(func.sum(models.Product.quantity)).scalar() or 0
@@ -648,4 +723,18 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
         "total_orders": total_orders,
         "total_products": total_products,
         "recent_orders": recent_orders
-    }
\ No newline at end of file
+    }
+
+# --- API LƯU TRỮ ĐƠN HÀNG CŨ ---
+@app.post("/admin/archive")
+def archive_old_orders(older_than_days: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Chuyển đơn completed/cancelled cũ hơn N ngày sang kho lưu trữ.
+    Mặc định N = ORDER_ARCHIVE_AFTER_DAYS (90 ngày).
+    """
+    days = older_than_days if older_than_days is not None else int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
+    try:
+        archived = archive.archive_orders(db, days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": f"Đã lưu trữ {archived} đơn hàng cũ hơn {days} ngày", "archived": archived}
@@ -0,0 +1,70 @@
+# FILE: MinePhone/backend/app/migrations.py
+# Migration đơn giản cho SQLite, đánh số phiên bản bằng PRAGMA user_version.
+#
+# create_all() chỉ tạo bảng còn thiếu, KHÔNG thêm index mới vào bảng đã có,
+# nên DB cũ (data/minephone.db) cần các bước dưới đây. Mỗi bước phải idempotent
+# (IF NOT EXISTS) vì DB mới tạo bằng create_all đã có sẵn index khai báo trong models.py.
+from sqlalchemy import text
+
+MIGRATIONS = [
+    (1, "Index cho các query nóng của products / orders / reviews", [
+        "CREATE INDEX IF NOT EXISTS ix_products_active_id ON products (is_active, id)",
+        "CREATE INDEX IF NOT EXISTS ix_products_active_price ON products (is_active, price)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_user_id_id ON orders (user_id, id)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_status_total ON orders (status, total)",
+        "CREATE INDEX IF NOT EXISTS ix_reviews_product_created ON reviews (product_id, created_at)",
+        "ANALYZE",  # Cập nhật thống kê để query planner chọn đúng index
+    ]),
+    (2, "Index tìm đơn đã xong theo ngày tạo (phục vụ lưu trữ)", [
+        "CREATE INDEX IF NOT EXISTS ix_orders_status_created ON orders (status, created_at)",
+    ]),
+    (3, "Đổi index (is_active, ...) của products sang partial index WHERE is_active = 1", [
+        "DROP INDEX IF EXISTS ix_products_active_id",
+        "DROP INDEX IF EXISTS ix_products_active_price",
+        "CREATE INDEX IF NOT EXISTS ix_products_live_id ON products (id) WHERE is_active = 1",
+        "CREATE INDEX IF NOT EXISTS ix_products_live_price ON products (price) WHERE is_active = 1",
+        "ANALYZE",
+    ]),
+    # SQLite không ALTER được PRIMARY KEY -> tạo bảng mới có AUTOINCREMENT rồi chép dữ liệu.
+    # Bước này cần DB archive đã ATTACH (database.py) và đã create_all bảng archive.
+    (4, "Dựng lại bảng orders với AUTOINCREMENT để ID đã lưu trữ không bị dùng lại", [
+        # Đơn mới lỡ nhận lại ID của đơn đã lưu trữ -> đổi sang ID mới, lớn hơn mọi ID hiện có
+        "UPDATE orders SET id = id + (SELECT max(id) FROM orders) "
+        "+ (SELECT coalesce(max(id), 0) FROM archive.archived_orders) "
+        "WHERE id IN (SELECT id FROM archive.archived_orders)",
+        "CREATE TABLE orders_new ("
+        "id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT, user_id INTEGER, total FLOAT, items JSON, "
+        "status VARCHAR, created_at DATETIME, FOREIGN KEY(user_id) REFERENCES users (id))",
+        "INSERT INTO orders_new (id, user_id, total, items, status, created_at) "
+        "SELECT id, user_id, total, items, status, created_at FROM orders",
+        "DROP TABLE orders",
+        "ALTER TABLE orders_new RENAME TO orders",
+        "CREATE INDEX ix_orders_id ON orders (id)",
+        "CREATE INDEX ix_orders_user_id_id ON orders (user_id, id)",
+        "CREATE INDEX ix_orders_status_total ON orders (status, total)",
+        "CREATE INDEX ix_orders_status_created ON orders (status, created_at)",
+        # Bộ đếm bắt đầu sau ID lớn nhất của cả orders lẫn archive
+        "INSERT INTO sqlite_sequence (name, seq) SELECT 'orders', 0 "
+        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'orders')",
+        "UPDATE sqlite_sequence SET seq = max(seq, "
+        "(SELECT coalesce(max(id), 0) FROM orders), "
+        "(SELECT coalesce(max(id), 0) FROM archive.archived_orders)) WHERE name = 'orders'",
+        "ANALYZE",
+    ]),
+]
+
+
+def run_migrations(engine) -> int:
+    """Chạy các migration chưa áp dụng theo thứ tự. Trả về phiên bản hiện tại của DB."""
+    with engine.begin() as conn:
+        version = conn.execute(text("PRAGMA user_version")).scalar() or 0
+        for number, description, statements in MIGRATIONS:
+            if number <= version:
+                continue
+            print(f"--- MIGRATION {number}: {description} ---")
+            for sql in statements:
+                conn.execute(text(sql))
+            # PRAGMA không nhận tham số bind -> number là hằng số trong code, an toàn
+            conn.execute(text(f"PRAGMA user_version = {number}"))
+            version = number
+    return version
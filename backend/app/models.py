@@ -1,7 +1,7 @@
 # FILE: MinePhone/backend/app/models.py
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
-from .database import Base
+from .database import Base, ArchiveBase
 from datetime import datetime
 
 class Product(Base):
@@ -25,6 +25,14 @@ class Product(Base):
     battery = Column(String)
     desc = Column(String, nullable=True)
 
+    # Index cho các query nóng (xem thêm migrations.py để áp dụng cho DB cũ)
+    # Partial index chỉ chứa sản phẩm đang bán: query compile is_active == True thành
+    # literal "is_active = 1" nên SQLite dùng được, sản phẩm đã ẩn không làm phình index
+    __table_args__ = (
+        Index("ix_products_live_id", "id", sqlite_where=text("is_active = 1")),       # Danh sách mặc định: mới nhất
+        Index("ix_products_live_price", "price", sqlite_where=text("is_active = 1")), # Lọc / sắp xếp theo giá
+    )
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -43,6 +51,14 @@ class Order(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     user = relationship("User", back_populates="orders")
 
+    __table_args__ = (
+        Index("ix_orders_user_id_id", "user_id", "id"),      # Lịch sử đơn của 1 user, mới nhất trước
+        Index("ix_orders_status_total", "status", "total"),  # Lọc theo trạng thái + SUM(total) không cần đọc bảng
+        Index("ix_orders_status_created", "status", "created_at"),  # Tìm đơn cũ đã xong để lưu trữ
+        # AUTOINCREMENT: không dùng lại ID của đơn lớn nhất vừa chuyển sang archive
+        {"sqlite_autoincrement": True},
+    )
+
 # --- MỚI: BẢNG REVIEW ---
 class Review(Base):
     __tablename__ = "reviews"
@@ -54,4 +70,35 @@ class Review(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationship để lấy tên người dùng
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_reviews_product_created", "product_id", "created_at"),  # Review của 1 sản phẩm, mới nhất trước
+    )
+
+# --- LƯU TRỮ ĐƠN HÀNG CŨ (DB archive, xem archive.py) ---
+class ArchivedOrder(ArchiveBase):
+    __tablename__ = "archived_orders"
+    id = Column(Integer, primary_key=True) # Giữ nguyên ID đơn gốc
+    user_id = Column(Integer)
+    username = Column(String) # Lưu kèm vì bảng users nằm ở DB chính
+    total = Column(Float)
+    items = Column(JSON)
+    status = Column(String)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_archived_orders_user_id_id", "user_id", "id"),
+        {"schema": "archive"},
+    )
+
+class OrderRollup(ArchiveBase):
+    """Tổng số đơn / tổng tiền của các đơn đã lưu trữ, theo tháng + trạng thái."""
+    __tablename__ = "order_rollups"
+    month = Column(String, primary_key=True) # "YYYY-MM" theo created_at
+    status = Column(String, primary_key=True)
+    order_count = Column(Integer, default=0)
+    total_sum = Column(Float, default=0)
+
+    __table_args__ = {"schema": "archive"}
@@ -0,0 +1,175 @@
+# FILE: MinePhone/backend/app/queries.py
+# Các câu query dạng Core (select theo cột) dùng cho những API danh sách chỉ đọc.
+# Trả về tuple thay vì ORM object -> bỏ qua bước hydrate ORM và validate pydantic.
+# Kèm phần trừ kho nguyên tử dùng chung cho create_order và script stress test.
+from typing import Callable, Optional
+
+from sqlalchemy import select, union_all, update
+
+from . import models
+
+# Thứ tự cột = thứ tự field trong schemas.Product (giữ nguyên contract JSON cũ)
+PRODUCT_FIELDS = {
+    "name": models.Product.name,
+    "brand": models.Product.brand,
+    "price": models.Product.price,
+    "old_price": models.Product.old_price,
+    "image": models.Product.image,
+    "quantity": models.Product.quantity,
+    "is_active": models.Product.is_active,
+    "ram": models.Product.ram,
+    "storage": models.Product.storage,
+    "condition": models.Product.condition,
+    "chip": models.Product.chip,
+    "screen": models.Product.screen,
+    "battery": models.Product.battery,
+    "desc": models.Product.desc,
+    "id": models.Product.id,
+    "created_at": models.Product.created_at,
+    "updated_at": models.Product.updated_at,
+}
+
+# Giống dict mà get_orders trả về trước đây
+ORDER_FIELDS = {
+    "id": models.Order.id,
+    "user_id": models.Order.user_id,
+    "username": models.User.username,
+    "total": models.Order.total,
+    "status": models.Order.status,
+    "created_at": models.Order.created_at,
+    "items": models.Order.items,
+}
+
+# Cùng key với ORDER_FIELDS, đọc từ bảng lưu trữ (username đã lưu sẵn)
+ARCHIVED_ORDER_FIELDS = {
+    "id": models.ArchivedOrder.id,
+    "user_id": models.ArchivedOrder.user_id,
+    "username": models.ArchivedOrder.username,
+    "total": models.ArchivedOrder.total,
+    "status": models.ArchivedOrder.status,
+    "created_at": models.ArchivedOrder.created_at,
+    "items": models.ArchivedOrder.items,
+}
+
+# Thứ tự field của schemas.ReviewResponse (ReviewCreate trước, rồi tới phần mở rộng)
+REVIEW_FIELDS = {
+    "user_id": models.Review.user_id,
+    "product_id": models.Review.product_id,
+    "rating": models.Review.rating,
+    "comment": models.Review.comment,
+    "id": models.Review.id,
+    "username": models.User.username,
+    "created_at": models.Review.created_at,
+}
+
+
+def pick_fields(available: dict, fields: Optional[str]) -> dict:
+    """
+    Sparse fieldset: 'id,name,price,image' -> chỉ giữ các cột được yêu cầu.
+    Không truyền fields thì trả về đầy đủ. Field không tồn tại / chỉ có dấu phẩy -> ValueError.
+    """
+    if not fields:
+        return available
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    if not names:
+        raise ValueError("Cần ít nhất 1 field")
+    unknown = [f for f in names if f not in available]
+    if unknown:
+        raise ValueError(f"Field không hợp lệ: {', '.join(unknown)}")
+    # Giữ thứ tự cột chuẩn, bỏ trùng lặp
+    return {name: col for name, col in available.items() if name in names}
+
+
+def products_list_stmt(
+    brand: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort_by: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    columns: dict = PRODUCT_FIELDS,
+):
+    """Query danh sách sản phẩm đang bán (cùng logic lọc/sắp xếp với get_products)."""
+    stmt = select(*columns.values()).where(models.Product.is_active == True)
+
+    if brand and brand != 'All':
+        stmt = stmt.where(models.Product.brand == brand)
+    if search:
+        stmt = stmt.where(models.Product.name.ilike(f"%{search}%"))
+    if min_price is not None:
+        stmt = stmt.where(models.Product.price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(models.Product.price <= max_price)
+
+    if sort_by == 'price_asc':
+        stmt = stmt.order_by(models.Product.price.asc())
+    elif sort_by == 'price_desc':
+        stmt = stmt.order_by(models.Product.price.desc())
+    else:
+        stmt = stmt.order_by(models.Product.id.desc())
+
+    return stmt.offset(skip).limit(limit)
+
+
+def orders_list_stmt(user_id: Optional[int] = None, columns: dict = ORDER_FIELDS):
+    """Query danh sách đơn hàng kèm username, mới nhất lên đầu."""
+    stmt = select(*columns.values())\
+        .select_from(models.Order)\
+        .join(models.User, models.Order.user_id == models.User.id)
+    if user_id:
+        stmt = stmt.where(models.Order.user_id == user_id)
+    return stmt.order_by(models.Order.id.desc())
+
+
+def orders_with_archive_stmt(user_id: Optional[int] = None, columns: dict = ORDER_FIELDS):
+    """
+    Giống orders_list_stmt nhưng gộp (UNION ALL) thêm đơn đã lưu trữ.
+    Luôn kèm cột _sort_id ở cuối để sắp xếp (kể cả khi client không xin field id),
+    nơi gọi phải bỏ cột này trước khi trả về.
+    """
+    live = select(*[col.label(name) for name, col in columns.items()], models.Order.id.label("_sort_id"))\
+        .select_from(models.Order)\
+        .join(models.User, models.Order.user_id == models.User.id)
+    archived = select(
+        *[ARCHIVED_ORDER_FIELDS[name].label(name) for name in columns],
+        models.ArchivedOrder.id.label("_sort_id"),
+    )
+    if user_id:
+        live = live.where(models.Order.user_id == user_id)
+        archived = archived.where(models.ArchivedOrder.user_id == user_id)
+
+    stmt = union_all(live, archived)
+    return stmt.order_by(stmt.selected_columns._sort_id.desc())
+
+
+def reviews_list_stmt(product_id: int):
+    """Query review của 1 sản phẩm kèm username, mới nhất lên đầu."""
+    return select(*REVIEW_FIELDS.values())\
+        .join(models.User, models.Review.user_id == models.User.id)\
+        .where(models.Review.product_id == product_id)\
+        .order_by(models.Review.created_at.desc())
+
+
+def decrement_stock_stmt(product_id: int, qty: int, held_by_others: int = 0):
+    """
+    Trừ kho nguyên tử: điều kiện "còn đủ hàng" nằm ngay trong câu UPDATE nên SQLite
+    kiểm tra và ghi dưới cùng 1 write lock -> 2 đơn đồng thời không ghi đè số lượng
+    của nhau (lost update). rowcount = 0 nghĩa là không đủ hàng.
+    """
+    return update(models.Product)\
+        .where(models.Product.id == product_id, models.Product.quantity - held_by_others >= qty)\
+        .values(quantity=models.Product.quantity - qty)\
+        .execution_options(synchronize_session=False)
+
+
+def decrement_stock(db, product_id: int, qty: int, held_by_others: Callable[[], int]) -> bool:
+    """
+    Trừ kho cho đơn (chưa commit). held_by_others() trả về số giỏ khác đang giữ.
+    Số giữ đọc trước UPDATE có thể đã cũ nếu UPDATE phải chờ lock (đơn khác vừa commit
+    rồi nhả hold). UPDATE thất bại vẫn giữ write lock của SQLite, nên đọc lại số giữ
+    lúc này là mới, thử lại đúng 1 lần.
+    """
+    if db.execute(decrement_stock_stmt(product_id, qty, held_by_others())).rowcount:
+        return True
+    return bool(db.execute(decrement_stock_stmt(product_id, qty, held_by_others())).rowcount)
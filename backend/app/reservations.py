@@ -0,0 +1,179 @@
+# FILE: MinePhone/backend/app/reservations.py
+# Giữ hàng tạm thời (hold có TTL) khi khách bỏ sản phẩm vào giỏ.
+#
+# - Hold chỉ nằm trong RAM, KHÔNG ghi vào DB -> thêm giỏ hàng không tạo lock ghi trên SQLite.
+# - Product.quantity chỉ bị trừ khi create_order chạy (UPDATE nguyên tử, xem queries.decrement_stock), lúc đó
+#   số lượng có thể bán = quantity - số đang được giỏ KHÁC giữ.
+# - Hold hết hạn được giải phóng hàng loạt bằng min-heap theo thời điểm hết hạn
+#   (xóa lười: entry cũ trong heap bị bỏ qua khi hold đã được gia hạn/xóa).
+# - cart_id do client tự sinh, không xác thực -> mỗi dòng giỏ giữ tối đa max_qty_per_line,
+#   và mỗi hold có tuổi thọ cứng max_lifetime mà việc gia hạn không kéo dài được.
+#   Hết tuổi thọ thì giỏ đó phải chờ thêm ttl_seconds mới giữ lại được sản phẩm này,
+#   để 1 client không thể gửi lại liên tục mà ôm hết hàng flash sale mãi mãi.
+#
+# Lưu ý: store nằm trong 1 process. Nếu chạy nhiều worker uvicorn thì cần
+# chuyển sang store dùng chung (Redis...) - hiện tại docker-compose chạy 1 worker.
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Số lần đọc lại tồn kho tối đa khi có hold của sản phẩm bị nhả trong lúc đọc
+MAX_STOCK_READS = 3
+
+
+class ReservationError(Exception):
+    """Không giữ được hàng cho giỏ này (hết hàng, vượt giới hạn giữ...)."""
+
+    def __init__(self, product_id: int, available: int, message: Optional[str] = None):
+        self.product_id = product_id
+        self.available = available
+        super().__init__(message or f"Sản phẩm ID {product_id} chỉ còn {available} chiếc có thể đặt.")
+
+
+@dataclass
+class Hold:
+    cart_id: str
+    product_id: int
+    qty: int
+    expires_at: float
+    started_at: float  # Lúc bắt đầu giữ, không đổi khi gia hạn / đổi số lượng
+
+
+class ReservationStore:
+    def __init__(
+        self,
+        ttl_seconds: float = 600,
+        max_qty_per_line: int = 5,
+        max_lifetime: float = 1800,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_qty_per_line = max_qty_per_line
+        self.max_lifetime = max_lifetime
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._holds: Dict[Tuple[str, int], Hold] = {}      # (cart_id, product_id) -> Hold
+        self._by_cart: Dict[str, Set[int]] = {}             # cart_id -> các product_id đang giữ
+        self._reserved: Dict[int, int] = {}                 # product_id -> tổng số đang giữ
+        self._heap: List[Tuple[float, str, int]] = []       # (expires_at | cooldown_until, cart_id, product_id)
+        self._released: Dict[int, int] = {}                 # product_id -> số lần có hold bị nhả
+        self._cooldown: Dict[Tuple[str, int], float] = {}   # hold đã hết tuổi thọ -> thời điểm được giữ lại
+
+    # --- Nội bộ (gọi khi đã giữ self._lock) ---
+
+    def _drop(self, key: Tuple[str, int]) -> Optional[Hold]:
+        hold = self._holds.pop(key, None)
+        if hold is None:
+            return None
+        products = self._by_cart.get(hold.cart_id)
+        if products is not None:
+            products.discard(hold.product_id)
+            if not products:
+                del self._by_cart[hold.cart_id]
+        self._released[hold.product_id] = self._released.get(hold.product_id, 0) + 1
+        left = self._reserved.get(hold.product_id, 0) - hold.qty
+        if left > 0:
+            self._reserved[hold.product_id] = left
+        else:
+            self._reserved.pop(hold.product_id, None)
+        return hold
+
+    def _expire(self, now: float) -> int:
+        """Giải phóng tất cả hold đã hết hạn (và cooldown đã hết). Trả về số hold bị xóa."""
+        released = 0
+        while self._heap and self._heap[0][0] <= now:
+            at, cart_id, product_id = heapq.heappop(self._heap)
+            key = (cart_id, product_id)
+            if self._cooldown.get(key) == at:
+                del self._cooldown[key]
+                continue
+            hold = self._holds.get(key)
+            # Entry cũ (hold đã gia hạn hoặc đã xóa) -> bỏ qua
+            if hold is None or hold.expires_at != at:
+                continue
+            self._drop(key)
+            released += 1
+            if at >= hold.started_at + self.max_lifetime:
+                # Hết tuổi thọ cứng: chưa cho giỏ này giữ lại ngay
+                until = at + self.ttl_seconds
+                self._cooldown[key] = until
+                heapq.heappush(self._heap, (until, cart_id, product_id))
+        return released
+
+    # --- API công khai ---
+
+    def expire(self) -> int:
+        with self._lock:
+            return self._expire(self._clock())
+
+    def reserved_by_others(self, product_id: int, cart_id: Optional[str] = None) -> int:
+        """Số lượng sản phẩm đang được các giỏ khác (khác cart_id) giữ."""
+        with self._lock:
+            self._expire(self._clock())
+            total = self._reserved.get(product_id, 0)
+            own = self._holds.get((cart_id, product_id))
+            return total - (own.qty if own else 0)
+
+    def reserve(self, cart_id: str, product_id: int, qty: int, get_stock: Callable[[], int]) -> Optional[Hold]:
+        """
+        Đặt số lượng giữ (tuyệt đối, không cộng dồn) của 1 sản phẩm trong giỏ và gia hạn TTL
+        (không quá started_at + max_lifetime). qty <= 0 nghĩa là bỏ giữ.
+        Raise ReservationError nếu không đủ hàng, qty > max_qty_per_line hoặc đang cooldown.
+
+        get_stock đọc tồn kho từ DB, gọi NGOÀI lock (không giữ lock trong lúc chờ SQLite).
+        Checkout trừ kho rồi mới release_cart, nên nếu có hold của sản phẩm bị nhả trong lúc
+        đọc thì số tồn kho có thể đã cũ -> đọc lại, tối đa MAX_STOCK_READS lần rồi dùng số
+        đọc cuối (có giữ vượt một chút thì checkout vẫn trừ kho nguyên tử, không bán quá).
+        """
+        key = (cart_id, product_id)
+        if qty > self.max_qty_per_line:
+            raise ReservationError(product_id, self.max_qty_per_line,
+                                   f"Mỗi giỏ chỉ giữ được tối đa {self.max_qty_per_line} chiếc sản phẩm ID {product_id}.")
+
+        for attempt in range(MAX_STOCK_READS):
+            with self._lock:
+                self._expire(self._clock())
+                if qty <= 0:
+                    self._drop(key)
+                    return None
+                released = self._released.get(product_id, 0)
+
+            stock = get_stock()
+
+            with self._lock:
+                now = self._clock()
+                self._expire(now)
+                if self._released.get(product_id, 0) != released and attempt < MAX_STOCK_READS - 1:
+                    continue
+
+                if key in self._cooldown:
+                    raise ReservationError(product_id, 0,
+                                           f"Giỏ đã giữ sản phẩm ID {product_id} quá lâu, "
+                                           f"thử lại sau {self._cooldown[key] - now:.0f} giây.")
+
+                own = self._holds.get(key)
+                others = self._reserved.get(product_id, 0) - (own.qty if own else 0)
+                available = stock - others
+                if qty > available:
+                    raise ReservationError(product_id, max(available, 0))
+
+                started_at = own.started_at if own else now
+                self._drop(key)
+                hold = Hold(cart_id, product_id, qty,
+                            min(now + self.ttl_seconds, started_at + self.max_lifetime), started_at)
+                self._holds[key] = hold
+                self._by_cart.setdefault(cart_id, set()).add(product_id)
+                self._reserved[product_id] = self._reserved.get(product_id, 0) + qty
+                heapq.heappush(self._heap, (hold.expires_at, cart_id, product_id))
+                return hold
+
+    def release_cart(self, cart_id: str, product_ids=None) -> int:
+        """Bỏ giữ toàn bộ (hoặc một số sản phẩm) của giỏ, vd: sau khi đặt hàng xong."""
+        with self._lock:
+            held = self._by_cart.get(cart_id, set())
+            targets = list(held) if product_ids is None else [p for p in product_ids if p in held]
+            for product_id in targets:
+                self._drop((cart_id, product_id))
+            return len(targets)
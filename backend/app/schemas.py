@@ -66,9 +66,16 @@ class OrderCreate(BaseModel):
     user_id: int
     total: float
     items: List[OrderItem]
+    cart_id: Optional[str] = None # Giỏ đang giữ hàng (nếu có) -> giải phóng sau khi đặt
+
+class ReserveReq(BaseModel):
+    cart_id: str
+    product_id: int
+    qty: int # Tổng số lượng muốn giữ trong giỏ (0 = bỏ giữ)
 
 class ChatReq(BaseModel):
-    message: str
+    message: str # Chỉ tin nhắn mới, lịch sử do server giữ theo session_id
+    session_id: Optional[str] = None # Lần đầu để trống, server sẽ tạo và trả về
 
 # --- MỚI: SCHEMA REVIEW & DASHBOARD ---
 class ReviewCreate(BaseModel):
@@ -0,0 +1,34 @@
+# FILE: MinePhone/backend/scripts/archive_orders.py
+# Chạy lưu trữ đơn hàng cũ (dùng cho cron), tương đương POST /admin/archive.
+#
+# Chạy từ thư mục backend:  python -m scripts.archive_orders [số_ngày]
+import os
+import sys
+
+from app import archive, models
+from app.database import SessionLocal, engine
+from app.migrations import run_migrations
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", "90"))
+
+    models.Base.metadata.create_all(bind=engine)
+    models.ArchiveBase.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    db = SessionLocal()
+    try:
+        archived = archive.archive_orders(db, days)
+        revenue, count = archive.archived_totals(db)
+    except ValueError as e:
+        sys.exit(str(e))
+    finally:
+        db.close()
+
+    print(f"Đã lưu trữ {archived} đơn hàng cũ hơn {days} ngày")
+    print(f"Kho lưu trữ hiện có {count} đơn, doanh thu completed {revenue:,.0f}đ")
+
+
+if __name__ == "__main__":
+    main()
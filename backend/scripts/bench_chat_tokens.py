@@ -0,0 +1,71 @@
+# FILE: MinePhone/backend/scripts/bench_chat_tokens.py
+# So sánh số prompt token gửi cho LLM trong 1 phiên chat dài:
+#   - last3  : client gửi 3 tin nhắn gần nhất kèm câu hỏi (ChatBot.tsx trước đây: messages.slice(-3))
+#   - resend : client gửi lại toàn bộ lịch sử mỗi lượt (mốc trên, không giới hạn)
+#   - session: client chỉ gửi tin mới + session_id, server cắt/tóm tắt theo ngân sách
+# Không gọi LLM thật, token được ước lượng bằng chat_sessions.estimate_tokens.
+# Session phải tốn KHÔNG nhiều hơn last3, nếu không -> AssertionError.
+#
+# Chạy từ thư mục backend:  python -m scripts.bench_chat_tokens [số_lượt] [ngân_sách_lịch_sử] [ngân_sách_tóm_tắt]
+# (không truyền ngân sách = dùng mặc định của ChatSessionStore, giống app)
+import sys
+
+from app.chat_sessions import ChatSessionStore, estimate_tokens
+
+SYSTEM_PROMPT = "Bạn là trợ lý ảo bán hàng của MinePhone. " * 20
+QUESTIONS = [
+    "Em ơi tầm 10 triệu thì nên mua máy nào chụp ảnh đẹp?",
+    "So sánh giúp anh Galaxy A55 với iPhone 13 về pin và camera nhé.",
+    "Máy nào chơi game ổn nhất trong tầm giá đó?",
+    "Còn hàng màu xanh không em, bảo hành bao lâu?",
+]
+REPLY = ("Dạ anh/chị tham khảo Samsung Galaxy A55 5G với màn hình Super AMOLED, "
+         "pin 5000 mAh và camera chụp đêm ấn tượng ạ. ") * 3
+
+
+def main():
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    store = ChatSessionStore()
+    if len(sys.argv) > 2:
+        store.history_token_budget = int(sys.argv[2])
+    if len(sys.argv) > 3:
+        store.summary_token_budget = int(sys.argv[3])
+    print(f"Ngân sách: lịch sử {store.history_token_budget}, tóm tắt {store.summary_token_budget} token")
+    session = store.get_or_create()
+    history = []
+    last3_total = resend_total = session_total = 0
+
+    print(f"{'turn':>5}{'last3':>8}{'resend':>8}{'session':>9}{'last3 cum':>12}{'resend cum':>12}{'session cum':>13}")
+    for i in range(1, turns + 1):
+        question = QUESTIONS[i % len(QUESTIONS)]
+
+        # Cách cũ của ChatBot.tsx: 3 tin gần nhất dồn vào 1 message
+        last3_message = "Lịch sử chat:\n" + "\n".join(history[-3:]) + f"\nKhách hàng: {question}"
+        last3_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(last3_message)
+
+        # Toàn bộ lịch sử dồn vào 1 message
+        resend_message = "Lịch sử chat:\n" + "\n".join(history) + f"\nKhách hàng: {question}"
+        resend_tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(resend_message)
+
+        # Cách mới: session phía server
+        messages = store.build_messages(session, SYSTEM_PROMPT, question)
+        session_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        store.record_turn(session, question, REPLY, messages)
+
+        history += [f"user: {question}", f"bot: {REPLY}"]
+        last3_total += last3_tokens
+        resend_total += resend_tokens
+        session_total += session_tokens
+        if i == 1 or i % 5 == 0:
+            print(f"{i:>5}{last3_tokens:>8}{resend_tokens:>8}{session_tokens:>9}"
+                  f"{last3_total:>12}{resend_total:>12}{session_total:>13}")
+
+    print(f"\nTổng prompt token sau {turns} lượt: last3={last3_total}, resend={resend_total}, session={session_total}")
+    print(f"session so với last3 (client cũ): {session_total / last3_total - 1:+.0%}, "
+          f"so với resend: {session_total / resend_total - 1:+.0%}")
+    print(f"Usage ghi nhận của session: {session.usage()}")
+    assert session_total <= last3_total, "Session tốn nhiều prompt token hơn client cũ (last3)!"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# FILE: MinePhone/backend/scripts/bench_payload.py
+# Đo số bytes thực gửi qua mạng của GET /products:
+# đầy đủ vs sparse fieldset (fields=...), không nén vs gzip vs brotli.
+#
+# Dữ liệu: bảng products trong data/minephone.db (seed + qinsert.sql).
+# Nếu DB chưa có sản phẩm, script nạp qinsert.sql vào DB tạm trong RAM.
+#
+# Chạy từ thư mục backend:  python -m scripts.bench_payload
+import os
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models, queries
+from app.compression import brotli, compress
+from app.fastjson import dumps_rows
+
+DB_PATH = "data/minephone.db"
+QINSERT_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "qinsert.sql")
+
+# Các bộ field mà màn hình dạng lưới cần
+FIELDSETS = [
+    ("full", None),
+    ("grid", "id,name,price,image"),
+    # = GRID_FIELDS ở HomePage.tsx (ProductCard + giỏ hàng / so sánh mở từ card)
+    ("card", "id,name,brand,price,old_price,image,condition,chip,storage,ram,screen,battery"),
+]
+
+
+def open_db():
+    if os.path.exists(DB_PATH):
+        engine = create_engine(f"sqlite:///{DB_PATH}")
+        db = sessionmaker(bind=engine)()
+        if db.execute(select(func.count(models.Product.id))).scalar():
+            return db, DB_PATH
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    with open(QINSERT_PATH, encoding="utf-8") as f:
+        engine.raw_connection().executescript(f.read())
+    return sessionmaker(bind=engine)(), "qinsert.sql"
+
+
+def main():
+    db, source = open_db()
+    encodings = ["gzip", "br"] if brotli is not None else ["gzip"]
+
+    print(f"Nguồn dữ liệu: {source}")
+    header = f"{'fields':<8}{'rows':>6}{'raw':>10}" + "".join(f"{e:>10}" for e in encodings) + f"{'saved':>9}"
+    print(header)
+
+    baseline = None
+    for label, fields in FIELDSETS:
+        columns = queries.pick_fields(queries.PRODUCT_FIELDS, fields)
+        rows = db.execute(queries.products_list_stmt(columns=columns)).all()
+        body = dumps_rows(list(columns), rows)
+        sizes = [len(body)] + [len(compress(body, e)) for e in encodings]
+        baseline = baseline or sizes[0]
+        saved = 1 - min(sizes) / baseline
+        print(f"{label:<8}{len(rows):>6}" + "".join(f"{s:>10}" for s in sizes) + f"{saved:>8.0%}")
+
+    print(f"\n(Đơn vị: bytes. So với 'full' không nén = {baseline} bytes)")
+    if brotli is None:
+        print("Chưa cài gói 'brotli' -> bỏ qua cột br.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# FILE: MinePhone/backend/scripts/bench_serialization.py
+# Benchmark: ORM + pydantic (cách cũ) vs tuple theo cột + orjson (fast path)
+# cho 3 API danh sách: /products, /orders, /products/{id}/reviews.
+#
+# Chạy từ thư mục backend:  python -m scripts.bench_serialization [số_dòng]
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, schemas, queries
+from app.fastjson import dumps_rows
+
+
+def build_db(n: int):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    now = datetime.utcnow()
+    db.add(models.User(id=1, username="bench", password="x", role="user"))
+    db.add_all([
+        models.Product(
+            id=i, name=f"Phone {i}", brand=("Apple", "Samsung", "Xiaomi")[i % 3],
+            price=5_000_000 + i * 1000, old_price=None if i % 2 else 9_000_000.0,
+            image=f"https://cdn.tgdd.vn/Products/Images/42/{300000 + i}/thumb-600x600.jpg",
+            quantity=i % 50, is_active=True, ram="8GB", storage="256GB",
+            condition="New 100%", chip="Snapdragon 8 Gen 3", screen="6.7 inch AMOLED",
+            battery="5000 mAh", desc="Mô tả sản phẩm " * 8,
+            created_at=now, updated_at=now,
+        )
+        for i in range(1, n + 1)
+    ])
+    db.add_all([
+        models.Order(
+            id=i, user_id=1, total=10_000_000.0, status="pending",
+            items=[{"id": 1, "name": "Phone 1", "price": 5_000_000.0, "qty": 2}],
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(1, n + 1)
+    ])
+    db.add_all([
+        models.Review(
+            id=i, user_id=1, product_id=1, rating=5, comment="Máy ngon, pin trâu",
+            created_at=now - timedelta(minutes=i),
+        )
+        for i in range(1, n + 1)
+    ])
+    db.commit()
+    return db
+
+
+# --- Cách cũ: hydrate ORM rồi validate/serialize qua pydantic ---
+products_adapter = TypeAdapter(List[schemas.Product])
+reviews_adapter = TypeAdapter(List[schemas.ReviewResponse])
+
+
+def legacy_products(db, n):
+    products = db.query(models.Product).filter(models.Product.is_active == True)\
+        .order_by(models.Product.id.desc()).limit(n).all()
+    return products_adapter.dump_json(products_adapter.validate_python(products, from_attributes=True))
+
+
+def legacy_orders(db, n):
+    results = db.query(models.Order, models.User.username)\
+        .join(models.User, models.Order.user_id == models.User.id)\
+        .order_by(models.Order.id.desc()).all()
+    response = [
+        {
+            "id": o.id, "user_id": o.user_id, "username": u, "total": o.total,
+            "status": o.status, "created_at": o.created_at.isoformat(), "items": o.items,
+        }
+        for o, u in results
+    ]
+    return json.dumps(response).encode()
+
+
+def legacy_reviews(db, n):
+    results = db.query(models.Review, models.User.username)\
+        .join(models.User, models.Review.user_id == models.User.id)\
+        .filter(models.Review.product_id == 1)\
+        .order_by(models.Review.created_at.desc()).all()
+    response = [
+        schemas.ReviewResponse(
+            id=r.id, user_id=r.user_id, product_id=r.product_id, rating=r.rating,
+            comment=r.comment, created_at=r.created_at, username=u,
+        )
+        for r, u in results
+    ]
+    return reviews_adapter.dump_json(response)
+
+
+# --- Fast path: giống hệt code trong main.py ---
+def fast_products(db, n):
+    rows = db.execute(queries.products_list_stmt(limit=n)).all()
+    return dumps_rows(list(queries.PRODUCT_FIELDS), rows)
+
+
+def fast_orders(db, n):
+    rows = db.execute(queries.orders_list_stmt()).all()
+    return dumps_rows(list(queries.ORDER_FIELDS), rows)
+
+
+def fast_reviews(db, n):
+    rows = db.execute(queries.reviews_list_stmt(1)).all()
+    return dumps_rows(list(queries.REVIEW_FIELDS), rows)
+
+
+def timeit(fn, db, n, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        db.expire_all()
+        start = time.perf_counter()
+        fn(db, n)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    db = build_db(n)
+    print(f"{'endpoint':<12}{'legacy (ms)':>14}{'fast (ms)':>12}{'speedup':>10}")
+    for name, legacy, fast in [
+        ("products", legacy_products, fast_products),
+        ("orders", legacy_orders, fast_orders),
+        ("reviews", legacy_reviews, fast_reviews),
+    ]:
+        # Contract JSON phải giống nhau trước khi so tốc độ
+        assert json.loads(legacy(db, n)) == json.loads(fast(db, n)), f"{name}: payload khác nhau"
+        t_legacy = timeit(legacy, db, n)
+        t_fast = timeit(fast, db, n)
+        print(f"{name:<12}{t_legacy * 1000:>14.1f}{t_fast * 1000:>12.1f}{t_legacy / t_fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# FILE: MinePhone/backend/scripts/check_archive.py
+# Kiểm tra vòng lưu trữ đơn hàng trên DB tạm qua TestClient:
+#   đặt đơn -> completed -> lưu trữ -> đặt đơn mới -> completed -> lưu trữ lần 2.
+# ID đơn mới không được trùng ID đã lưu trữ (trước đây SQLite dùng lại MAX(id) vừa bị xóa),
+# lưu trữ lần 2 phải thành công và dashboard vẫn đếm đủ. Sai kỳ vọng -> AssertionError.
+#
+# Chạy từ thư mục backend:  python -m scripts.check_archive
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Phải set trước khi import app: DB chính + DB archive tạm
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'check.db')}"
+os.environ["ARCHIVE_DATABASE_PATH"] = os.path.join(_tmpdir, "check_archive.db")
+os.environ.setdefault("OPENROUTER_API_KEY", "check")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import main, models  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+
+client = TestClient(main.app)
+
+
+def place_completed_order(days_ago: int) -> int:
+    """Đặt 1 đơn, chuyển sang completed và lùi ngày tạo để đủ tuổi lưu trữ."""
+    res = client.post("/orders", json={
+        "user_id": 1, "total": 1_000_000, "items": [{"id": 1, "name": "Phone", "price": 1_000_000, "qty": 1}],
+    })
+    assert res.status_code == 200, res.text
+    order_id = res.json()["id"]
+    assert client.patch(f"/orders/{order_id}/status", params={"status": "completed"}).status_code == 200
+
+    db = SessionLocal()
+    db.query(models.Order).filter(models.Order.id == order_id)\
+        .update({models.Order.created_at: datetime.utcnow() - timedelta(days=days_ago)})
+    db.commit()
+    db.close()
+    return order_id
+
+
+def archive(days: int):
+    return client.post("/admin/archive", params={"older_than_days": days})
+
+
+def main_check():
+    db = SessionLocal()
+    db.add(models.User(id=1, username="check", password="x", role="user"))
+    db.add(models.Product(id=1, name="Phone", brand="Apple", price=1_000_000, image="", quantity=10, is_active=True))
+    db.commit()
+    db.close()
+
+    res = archive(0)
+    print(f"older_than_days=0   : HTTP {res.status_code}")
+    assert res.status_code == 400
+
+    first = place_completed_order(days_ago=10)
+    res = archive(1)
+    print(f"lưu trữ lần 1       : {res.json()}")
+    assert res.status_code == 200 and res.json()["archived"] == 1
+
+    second = place_completed_order(days_ago=10)
+    print(f"đơn mới sau lưu trữ : #{second} (đơn đã lưu trữ: #{first})")
+    assert second > first
+
+    res = archive(1)
+    print(f"lưu trữ lần 2       : HTTP {res.status_code} {res.text}")
+    assert res.status_code == 200 and res.json()["archived"] == 1
+
+    ids = [o["id"] for o in client.get("/orders", params={"user_id": 1, "include_archived": True}).json()]
+    stats = client.get("/admin/stats").json()
+    print(f"orders+archive      : {ids}, dashboard total_orders={stats['total_orders']}")
+    assert ids == [second, first] and stats["total_orders"] == 2
+    print("OK")
+
+
+if __name__ == "__main__":
+    main_check()
@@ -0,0 +1,117 @@
+# FILE: MinePhone/backend/scripts/check_llm_gateway.py
+# Kiểm tra LLMGateway với stub server (scripts/llm_stub_server.py) chèn độ trễ và lỗi.
+# Mỗi kịch bản in thời gian, model trả lời và số lần stub bị gọi; sai kỳ vọng -> AssertionError.
+#
+# Chạy từ thư mục backend:  python -m scripts.check_llm_gateway
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI
+
+from app.llm_gateway import LLMGateway, LLMUnavailable, TokenBucket
+from scripts.llm_stub_server import StubConfig, start
+
+MESSAGES = [{"role": "user", "content": "Tầm 10 triệu mua máy nào?"}]
+
+
+def make_gateway(behaviours, models, **kwargs):
+    config = StubConfig(behaviours)
+    server = start(config)
+    client = OpenAI(base_url=f"http://127.0.0.1:{server.server_address[1]}/v1", api_key="stub")
+    return LLMGateway(client, models, **kwargs), config, server
+
+
+def timed(fn):
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except LLMUnavailable as e:
+        result = e
+    return result, time.perf_counter() - start
+
+
+def model_of(result):
+    return result.model if not isinstance(result, Exception) else type(result).__name__
+
+
+def scenario_hedge():
+    gw, config, server = make_gateway(
+        {"slow": {"latency": 3}, "fast": {"latency": 0.05}}, ["slow", "fast"], timeout=5, hedge_delay=0.3)
+    result, elapsed = timed(lambda: gw.complete(MESSAGES))
+    print(f"hedge      : {model_of(result)} sau {elapsed:.2f}s (primary chậm 3s, hedge sau 0.3s)")
+    assert model_of(result) == "fast" and elapsed < 1
+    server.shutdown()
+
+
+def scenario_breaker():
+    gw, config, server = make_gateway(
+        {"broken": {"error": 1, "status": 500}}, ["broken", "backup"],
+        timeout=5, hedge_delay=2, failure_threshold=3, reset_timeout=60)
+    for i in range(6):
+        result, elapsed = timed(lambda: gw.complete(MESSAGES + [{"role": "user", "content": str(i)}]))
+        assert model_of(result) == "backup"
+    print(f"breaker    : 6 request đều do backup trả lời, broken bị gọi {config.calls.get('broken')} lần,"
+          f" trạng thái {gw.status()}")
+    assert config.calls.get("broken") == 3 and gw.status()["broken"] == "open"
+    server.shutdown()
+
+
+def scenario_coalesce():
+    gw, config, server = make_gateway({"m": {"latency": 0.5}}, ["m"], timeout=5)
+    with ThreadPoolExecutor(10) as pool:
+        results = list(pool.map(lambda _: gw.complete(MESSAGES), range(10)))
+    print(f"coalesce   : 10 request giống nhau -> stub bị gọi {config.calls.get('m')} lần")
+    assert all(model_of(r) == "m" for r in results) and config.calls.get("m") == 1
+    server.shutdown()
+
+
+def scenario_rate_limit():
+    gw, config, server = make_gateway(
+        {}, ["m"], timeout=10, rate_limiter=TokenBucket(rate=2, capacity=2))
+    start_t = time.perf_counter()
+    for i in range(6):
+        gw.complete(MESSAGES + [{"role": "user", "content": str(i)}])
+    elapsed = time.perf_counter() - start_t
+    print(f"rate limit : 6 request với 2 req/s (burst 2) mất {elapsed:.2f}s")
+    assert elapsed >= 1.8
+    server.shutdown()
+
+
+def scenario_queue_deadline():
+    # 1 req/s: request thứ 2 phải chờ token ~1s, chỉ còn ~0.2s của deadline 1.2s.
+    # Không được gọi model với 0.2s rồi tính timeout đó là lỗi (breaker ngưỡng 1 sẽ mở).
+    gw, config, server = make_gateway(
+        {"m": {"latency": 0.3}}, ["m"], timeout=1.2, hedge_delay=1,
+        rate_limiter=TokenBucket(rate=1, capacity=1), failure_threshold=1)
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(
+            lambda i: timed(lambda: gw.complete(MESSAGES + [{"role": "user", "content": str(i)}]))[0], range(3)))
+    time.sleep(0.5)  # Chờ callback breaker của các lời gọi bị bỏ lại (nếu có)
+    print(f"queue      : {[model_of(r) for r in results]}, stub bị gọi {config.calls.get('m')} lần,"
+          f" trạng thái {gw.status()}")
+    assert sum(model_of(r) == "m" for r in results) == 1 and config.calls.get("m") == 1
+    assert gw.status()["m"] == "closed"
+    server.shutdown()
+
+
+def scenario_deadline():
+    gw, config, server = make_gateway(
+        {"a": {"latency": 5}, "b": {"latency": 5}}, ["a", "b"], timeout=1, hedge_delay=0.3)
+    result, elapsed = timed(lambda: gw.complete(MESSAGES))
+    print(f"deadline   : {model_of(result)} sau {elapsed:.2f}s (deadline 1s, model chậm 5s)")
+    assert isinstance(result, LLMUnavailable) and elapsed < 1.5
+    server.shutdown()
+
+
+def main():
+    scenario_hedge()
+    scenario_breaker()
+    scenario_coalesce()
+    scenario_rate_limit()
+    scenario_queue_deadline()
+    scenario_deadline()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# FILE: MinePhone/backend/scripts/explain_audit.py
+# Kiểm tra query plan của TẤT CẢ query mà các API thực sự chạy.
+#
+# 1. Tạo DB SQLite tạm với dữ liệu giả lập lớn (chạy app bằng DATABASE_URL trỏ vào DB này,
+#    nên create_all + migrations cũng được áp dụng như thật), rồi ANALYZE.
+# 2. Gọi lần lượt từng endpoint qua TestClient, bắt mọi câu SELECT/UPDATE/DELETE
+#    bằng event before_cursor_execute của SQLAlchemy.
+# 3. Chạy EXPLAIN QUERY PLAN cho từng câu. Có "SCAN <bảng>" (duyệt toàn bộ) hoặc
+#    "USE TEMP B-TREE" (sắp xếp không có index) mà không nằm trong ALLOWED_SCANS -> exit 1.
+#
+# Chạy từ thư mục backend:  python -m scripts.explain_audit [số_đơn_hàng]
+import os
+import random
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Phải set trước khi import app: DB tạm + trỏ chatbot vào cổng đóng để gọi AI lỗi ngay
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'audit.db')}"
+os.environ["ARCHIVE_DATABASE_PATH"] = os.path.join(_tmpdir, "audit_archive.db")
+os.environ.setdefault("OPENROUTER_API_KEY", "audit")
+os.environ["BASE_URL_CHATBOT"] = "http://127.0.0.1:9/v1"
+os.environ["LLM_TIMEOUT"] = "2"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import main  # noqa: E402
+from app.database import engine  # noqa: E402
+
+BRANDS = ["Apple", "Samsung", "Xiaomi", "Oppo", "Vivo", "Realme", "Nokia", "Google"]
+STATUSES = ["pending", "shipping", "completed", "cancelled"]
+
+# Các trường hợp duyệt toàn bộ là CỐ Ý (không index nào giúp được): (bảng, regex trên SQL, lý do)
+ALLOWED_SCANS = [
+    ("orders", r"count\(\*\)", "Đếm tổng số đơn cho dashboard: luôn phải duyệt hết"),
+    ("orders", r"FROM orders JOIN users.*LIMIT", "5 đơn mới nhất: duyệt theo rowid giảm dần, dừng sau LIMIT"),
+    ("orders", r"^(?!.*WHERE).*FROM orders JOIN users", "Admin xem toàn bộ đơn hàng (không có bộ lọc)"),
+    ("products", r"^(?!.*WHERE).*FROM products", "Toàn bộ catalog: tổng tồn kho / context cho chatbot"),
+    ("products", r"WHERE products\.is_active = 1\s*$", "Mọi sản phẩm đang bán làm context cho chatbot"),
+    ("products", r"WHERE products\.is_active = 1 ORDER BY products\.id DESC\s+LIMIT",
+     "Mới nhất: duyệt rowid giảm dần, dừng sau LIMIT (đa số đang bán, ix_products_live_id không lọc bớt được)"),
+    ("products", r"is_active = 1 ORDER BY products\.price .*LIMIT",
+     "Sắp xếp theo giá: duyệt partial index ix_products_live_price theo thứ tự, dừng sau LIMIT"),
+    ("products", r"LIKE", "Tìm theo tên dạng %...%: không index nào dùng được"),
+    ("archive.order_rollups", r"order_rollups", "Bảng tổng hợp theo tháng x trạng thái, chỉ vài trăm dòng"),
+]
+
+# (nhãn, method, url, kwargs) - mỗi endpoint có truy cập DB, kèm các biến thể tham số
+ENDPOINT_CALLS = [
+    ("register", "POST", "/auth/register", {"json": {"username": "audit_new", "password": "x"}}),
+    ("login", "POST", "/auth/login", {"json": {"username": "user1", "password": "x"}}),
+    ("products:newest", "GET", "/products", {}),
+    ("products:brand", "GET", "/products", {"params": {"brand": "Apple"}}),
+    ("products:search", "GET", "/products", {"params": {"search": "Phone 12"}}),
+    ("products:price_asc", "GET", "/products", {"params": {"sort_by": "price_asc"}}),
+    ("products:price_range", "GET", "/products",
+     {"params": {"min_price": 10_000_000, "max_price": 20_000_000, "sort_by": "price_desc"}}),
+    ("products:fields", "GET", "/products", {"params": {"fields": "id,name,price,image", "skip": 500}}),
+    ("product_detail", "GET", "/products/42", {}),
+    ("product_update", "PUT", "/products/42", {"json": {"price": 9_990_000}}),
+    ("product_delete", "DELETE", "/products/43", {}),
+    ("reviews", "GET", "/products/7/reviews", {}),
+    ("review_create", "POST", "/reviews", {"json": {"user_id": 1, "product_id": 7, "rating": 5, "comment": "ok"}}),
+    ("cart_reserve", "POST", "/cart/reserve", {"json": {"cart_id": "audit", "product_id": 1, "qty": 1}}),
+    ("order_create", "POST", "/orders",
+     {"json": {"user_id": 1, "total": 1.0, "items": [{"id": 1, "name": "p", "price": 1.0, "qty": 1}],
+               "cart_id": "audit"}}),
+    ("orders:user", "GET", "/orders", {"params": {"user_id": 1}}),
+    ("orders:all", "GET", "/orders", {}),
+    ("admin_archive", "POST", "/admin/archive", {"params": {"older_than_days": 30}}),
+    ("orders:user+archive", "GET", "/orders", {"params": {"user_id": 1, "include_archived": True}}),
+    ("order_status", "PATCH", "/orders/5/status", {"params": {"status": "completed"}}),
+    ("admin_stats", "GET", "/admin/stats", {}),
+    ("ai_chat", "POST", "/ai/chat", {"json": {"message": "xin chào"}}),
+    ("api_chat", "POST", "/api/chat", {"json": {"message": "xin chào"}}),
+]
+
+
+def seed(orders: int) -> None:
+    products, users, reviews = orders // 5, orders // 50, orders // 2
+    now = datetime.utcnow()
+    password = main.get_password_hash("x")
+    rnd = random.Random(42)
+
+    raw = engine.raw_connection()
+    cur = raw.cursor()
+    cur.executemany(
+        "INSERT INTO users (id, username, password, role) VALUES (?, ?, ?, 'user')",
+        [(i, f"user{i}", password) for i in range(1, users + 1)],
+    )
+    cur.executemany(
+        'INSERT INTO products (id, name, brand, price, image, quantity, is_active, ram, storage, '
+        'condition, chip, screen, battery, "desc", created_at, updated_at) '
+        "VALUES (?, ?, ?, ?, 'img', ?, ?, '8GB', '256GB', 'New', 'chip', '6.7', '5000', 'desc', ?, ?)",
+        [(i, f"Phone {i}", rnd.choice(BRANDS), rnd.randint(2, 40) * 1_000_000, rnd.randint(0, 50),
+          1 if rnd.random() < 0.9 else 0, now, now) for i in range(1, products + 1)],
+    )
+    cur.executemany(
+        "INSERT INTO orders (id, user_id, total, items, status, created_at) VALUES (?, ?, ?, '[]', ?, ?)",
+        [(i, rnd.randint(1, users), rnd.randint(1, 50) * 1_000_000, rnd.choice(STATUSES),
+          now - timedelta(minutes=orders - i)) for i in range(1, orders + 1)],
+    )
+    cur.executemany(
+        "INSERT INTO reviews (id, user_id, product_id, rating, comment, created_at) VALUES (?, ?, ?, 5, 'ok', ?)",
+        [(i, rnd.randint(1, users), rnd.randint(1, products), now - timedelta(minutes=i))
+         for i in range(1, reviews + 1)],
+    )
+    cur.execute("ANALYZE")
+    raw.commit()
+    raw.close()
+
+
+def capture_queries():
+    """Gọi từng endpoint, trả về [(nhãn, sql, params)] các câu cần kiểm tra (bỏ trùng)."""
+    captured, seen, current = [], set(), {"label": None}
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            return
+        if statement not in seen:
+            seen.add(statement)
+            captured.append((current["label"], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    client = TestClient(main.app, raise_server_exceptions=False)
+    try:
+        for label, method, url, kwargs in ENDPOINT_CALLS:
+            current["label"] = label
+            res = client.request(method, url, **kwargs)
+            if res.status_code >= 500:
+                print(f"[cảnh báo] {label}: HTTP {res.status_code}")
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return captured
+
+
+def problems(sql: str, plan):
+    """Các dòng plan là full scan / sort tạm mà không được phép."""
+    bad = []
+    for detail in plan:
+        if "USE TEMP B-TREE" in detail:
+            bad.append(detail)
+            continue
+        m = re.match(r"SCAN (?:TABLE )?([\w.]+)", detail)
+        if not m:
+            continue
+        allowed = any(
+            table == m.group(1) and re.search(pattern, sql, re.S | re.I)
+            for table, pattern, _ in ALLOWED_SCANS
+        )
+        if not allowed:
+            bad.append(detail)
+    return bad
+
+
+def main_audit():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"Tạo dữ liệu giả lập: {orders} đơn hàng ({os.environ['DATABASE_URL']})")
+    seed(orders)
+
+    failures = 0
+    with engine.connect() as conn:
+        for label, sql, params in capture_queries():
+            plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+            bad = problems(sql, plan)
+            failures += bool(bad)
+            print(f"\n[{'FAIL' if bad else ' OK '}] {label}: {' '.join(sql.split())[:150]}")
+            for detail in plan:
+                print(f"        {'!!' if detail in bad else '  '} {detail}")
+
+    print(f"\n{failures} query có full scan / sort không index" if failures else "\nKhông phát hiện full scan ngoài danh sách cho phép.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main_audit()
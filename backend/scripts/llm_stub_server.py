@@ -0,0 +1,118 @@
+# FILE: MinePhone/backend/scripts/llm_stub_server.py
+# Server giả lập API OpenAI/OpenRouter (POST .../chat/completions) để test LLMGateway
+# mà không cần API key. Có thể chèn độ trễ và lỗi theo từng model.
+#
+# Chạy từ thư mục backend:
+#   python -m scripts.llm_stub_server --port 8089 \
+#       --model "slow/model:latency=8" --model "flaky/model:error=0.5,status=429"
+# Rồi trỏ backend vào stub: BASE_URL_CHATBOT=http://localhost:8089/v1
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class StubConfig:
+    """Hành vi theo model: latency (giây), error (tỉ lệ lỗi 0..1), status (mã HTTP khi lỗi)."""
+
+    def __init__(self, behaviours: Dict[str, dict] = None, default_latency: float = 0.05):
+        self.behaviours = behaviours or {}
+        self.default_latency = default_latency
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = {}
+
+    def behaviour(self, model: str) -> dict:
+        return self.behaviours.get(model, {})
+
+    def count(self, model: str) -> None:
+        with self.lock:
+            self.calls[model] = self.calls.get(model, 0) + 1
+
+
+def make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass  # Tắt log mỗi request cho gọn
+
+        def _send(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "not found"}})
+                return
+
+            req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            model = req.get("model", "")
+            b = config.behaviour(model)
+            config.count(model)
+
+            time.sleep(b.get("latency", config.default_latency))
+            if random.random() < b.get("error", 0):
+                status = int(b.get("status", 500))
+                self._send(status, {"error": {"message": f"stub error {status}", "code": status}})
+                return
+
+            prompt = sum(len(m.get("content") or "") for m in req.get("messages", [])) // 4
+            reply = f"[{model}] Dạ em là bot giả lập."
+            self._send(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt,
+                    "completion_tokens": len(reply) // 4,
+                    "total_tokens": prompt + len(reply) // 4,
+                },
+            })
+
+    return Handler
+
+
+def start(config: StubConfig, port: int = 0) -> ThreadingHTTPServer:
+    """Chạy stub ở thread nền (port=0: tự chọn port trống). Trả về server để lấy port/shutdown."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_model_arg(value: str):
+    """'flaky/model:error=0.5,status=429' -> ('flaky/model', {'error': 0.5, 'status': 429.0})"""
+    name, _, opts = value.rpartition(":") if "=" in value else (value, "", "")
+    behaviour = {}
+    for opt in filter(None, opts.split(",")):
+        k, _, v = opt.partition("=")
+        behaviour[k.strip()] = float(v)
+    return name, behaviour
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat completions server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05, help="Độ trễ mặc định (giây)")
+    parser.add_argument("--model", action="append", default=[], help="model:latency=..,error=..,status=..")
+    args = parser.parse_args()
+
+    config = StubConfig(dict(parse_model_arg(m) for m in args.model), default_latency=args.latency)
+    server = ThreadingHTTPServer(("0.0.0.0", args.port), make_handler(config))
+    print(f"Stub LLM đang chạy tại http://localhost:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# FILE: MinePhone/backend/scripts/stress_reservations.py
+# Stress test "flash sale": nhiều khách cùng tranh vài chiếc cuối cùng.
+#
+# So sánh 2 kịch bản trên cùng 1 file SQLite tạm:
+#   - no-hold : bỏ giỏ thoải mái, chỉ kiểm tra kho lúc checkout (như trước đây).
+#               Khách checkout thất bại sẽ thử lại vài lần -> retry storm vào /orders.
+#   - hold    : giữ hàng (ReservationStore) ngay lúc thêm vào giỏ. Hết hàng thì bị
+#               từ chối sớm, không phải đi hết một vòng checkout.
+#
+# Chạy từ thư mục backend:  python -m scripts.stress_reservations [số_khách] [tồn_kho]
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import models, queries
+from app.reservations import ReservationStore, ReservationError
+
+PRODUCT_ID = 1
+CHECKOUT_RETRIES = 3
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {
+            "sold": 0, "failed_checkouts": 0, "rejected_at_cart": 0,
+            "write_txns": 0, "lock_errors": 0,
+        }
+
+    def inc(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+
+def build_db(stock: int):
+    path = os.path.join(tempfile.mkdtemp(), "stress.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 5})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    db.add(models.User(id=1, username="bench", password="x", role="user"))
+    db.add(models.Product(id=PRODUCT_ID, name="Flash Sale Phone", brand="Apple", price=1.0,
+                          image="", quantity=stock, is_active=True))
+    db.commit()
+    db.close()
+    return Session
+
+
+def checkout(Session, stats, store, cart_id):
+    """Giống logic create_order: trừ kho nguyên tử (trừ phần giỏ khác giữ), tạo đơn."""
+    db = Session()
+    try:
+        stats.inc("write_txns")
+        held = (lambda: store.reserved_by_others(PRODUCT_ID, cart_id)) if store else (lambda: 0)
+        if not queries.decrement_stock(db, PRODUCT_ID, 1, held):
+            db.rollback()
+            return False
+        db.add(models.Order(user_id=1, total=1.0, items=[{"id": PRODUCT_ID, "qty": 1}],
+                            status="pending", created_at=datetime.utcnow()))
+        db.commit()
+        if store:
+            store.release_cart(cart_id)
+        return True
+    except OperationalError:
+        db.rollback()
+        stats.inc("lock_errors")
+        return False
+    finally:
+        db.close()
+
+
+def shopper(Session, stats, store, think_time):
+    cart_id = uuid.uuid4().hex
+
+    if store is not None:
+        # Thêm vào giỏ = giữ hàng (chỉ đọc DB)
+        db = Session()
+        try:
+            store.reserve(cart_id, PRODUCT_ID, 1,
+                          lambda: db.query(models.Product.quantity).filter(models.Product.id == PRODUCT_ID).scalar())
+        except ReservationError:
+            stats.inc("rejected_at_cart")
+            return
+        finally:
+            db.close()
+
+    time.sleep(random.uniform(0, think_time))  # Khách xem giỏ, nhập địa chỉ...
+
+    for _ in range(CHECKOUT_RETRIES):
+        if checkout(Session, stats, store, cart_id):
+            stats.inc("sold")
+            return
+        stats.inc("failed_checkouts")
+        time.sleep(0.01)
+
+
+def run(label, shoppers, stock, use_holds, think_time=0.05):
+    Session = build_db(stock)
+    stats = Stats()
+    store = ReservationStore(ttl_seconds=60) if use_holds else None
+
+    threads = [threading.Thread(target=shopper, args=(Session, stats, store, think_time))
+               for _ in range(shoppers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    c = stats.counts
+    print(f"{label:<8}{c['sold']:>6}{c['failed_checkouts']:>10}{c['rejected_at_cart']:>10}"
+          f"{c['write_txns']:>8}{c['lock_errors']:>7}{elapsed:>9.2f}s")
+    return c
+
+
+def main():
+    shoppers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    stock = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    random.seed(42)
+
+    print(f"{shoppers} khách tranh {stock} chiếc")
+    print(f"{'mode':<8}{'sold':>6}{'failed':>10}{'rejected':>10}{'txns':>8}{'locks':>7}{'time':>10}")
+    no_hold = run("no-hold", shoppers, stock, use_holds=False)
+    hold = run("hold", shoppers, stock, use_holds=True)
+
+    assert no_hold["sold"] <= stock and hold["sold"] <= stock, "Bán quá số lượng tồn kho!"
+    print("\nfailed = checkout thất bại sau khi đã đi hết 1 vòng /orders (tính cả retry)")
+    print("rejected = bị từ chối ngay lúc thêm vào giỏ (không tốn transaction ghi)")
+
+
+if __name__ == "__main__":
+    main()
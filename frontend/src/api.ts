@@ -19,7 +19,8 @@ export const getProducts = async (
     search?: string,
     minPrice?: number,
     maxPrice?: number,
-    sortBy?: string
+    sortBy?: string,
+    fields?: string[] // Chỉ lấy một số cột, vd: ['id', 'name', 'price', 'image']
 ) => {
   const params: any = {};
   
@@ -28,6 +29,7 @@ export const getProducts = async (
   if (minPrice) params.min_price = minPrice;
   if (maxPrice) params.max_price = maxPrice;
   if (sortBy) params.sort_by = sortBy;
+  if (fields && fields.length) params.fields = fields.join(',');
   
   const res = await api.get<Product[]>('/products', { params });
   return res.data;
@@ -95,9 +97,24 @@ export const createOrder = async (orderData: any) => {
   return res.data;
 };
 
+// Giữ hàng tạm cho 1 sản phẩm trong giỏ (qty = tổng số lượng trong giỏ, 0 = bỏ giữ)
+// Backend trả 409 nếu không đủ hàng
+export const reserveStock = async (cartId: string, productId: number, qty: number) => {
+    const res = await api.post('/cart/reserve', { cart_id: cartId, product_id: productId, qty });
+    return res.data;
+};
+
+// Bỏ giữ toàn bộ hàng của giỏ
+export const releaseCartStock = async (cartId: string) => {
+    const res = await api.delete(`/cart/${cartId}/reserve`);
+    return res.data;
+};
+
 // Lấy danh sách đơn hàng (Có thể lọc theo User ID)
-export const getOrders = async (userId?: number) => {
-    const params = userId ? { user_id: userId } : {};
+export const getOrders = async (userId?: number, fields?: string[], includeArchived: boolean = false) => {
+    const params: any = userId ? { user_id: userId } : {};
+    if (fields && fields.length) params.fields = fields.join(',');
+    if (includeArchived) params.include_archived = true; // Gộp cả đơn cũ đã lưu trữ
     const res = await api.get('/orders', { params });
     return res.data;
 };
@@ -112,8 +129,8 @@ export const updateOrderStatus = async (orderId: number, status: string) => {
 };
 
 // --- 4. AI APIs (SPRINT 3) ---
-export const aiChat = async (message: string) => {
-  const res = await api.post('/ai/chat', { message });
+export const aiChat = async (message: string, sessionId?: string | null) => {
+  const res = await api.post('/ai/chat', { message, session_id: sessionId });
   return res.data;
 };
 
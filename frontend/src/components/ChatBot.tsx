@@ -17,6 +17,8 @@ const ChatBot: React.FC = () => {
   ]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  // Server giữ lịch sử hội thoại theo session_id, client chỉ gửi tin nhắn mới
+  const [sessionId, setSessionId] = useState<string | null>(null);
   const messagesEndRef = useRef<HTMLDivElement>(null);
   const navigate = useNavigate();
 
@@ -32,11 +34,8 @@ const ChatBot: React.FC = () => {
     setIsLoading(true);
 
     try {
-      // Gửi context để AI nhớ hội thoại cũ
-      const context = messages.slice(-3).map(m => `${m.sender}: ${m.text}`).join('\n');
-      const prompt = `Lịch sử chat:\n${context}\nKhách hàng: ${userMsg.text}`;
-
-      const res = await api.post('/ai/chat', { message: prompt });
+      const res = await api.post('/ai/chat', { message: userMsg.text, session_id: sessionId });
+      if (res.data.session_id) setSessionId(res.data.session_id);
       const botMsg: Message = { id: Date.now() + 1, text: res.data.reply, sender: 'bot' };
       setMessages(prev => [...prev, botMsg]);
     } catch (error) {
@@ -1,12 +1,14 @@
 // FILE: MinePhone/frontend/src/context/StoreContext.tsx
-import React, { createContext, useContext, useState, useEffect } from 'react';
+import React, { createContext, useContext, useState, useEffect, useRef } from 'react';
 import type { Product, CartItem, User } from '../types';
 import Toastify from 'toastify-js';
+import { reserveStock, releaseCartStock } from '../api';
 
 // Định nghĩa kiểu dữ liệu cho Context
 interface StoreContextType {
     // --- STATE GIỎ HÀNG ---
     cart: CartItem[];
+    cartId: string; // Mã giỏ hàng dùng để giữ hàng tạm trên server
     // Cập nhật quan trọng: Thêm tham số quantity (mặc định = 1)
     addToCart: (product: Product, quantity?: number) => void;
     removeFromCart: (id: number) => void;
@@ -45,8 +47,20 @@ export const StoreProvider: React.FC<{children: React.ReactNode}> = ({ children
         } catch { return []; }
     });
     
+    const [cartId] = useState<string>(() => {
+        const saved = localStorage.getItem('minephone_cart_id');
+        if (saved) return saved;
+        const id = `${Date.now().toString(36)}${Math.random().toString(36).slice(2)}`;
+        localStorage.setItem('minephone_cart_id', id);
+        return id;
+    });
+
     const [compareList, setCompareList] = useState<Product[]>([]);
 
+    // Bản giỏ mới nhất (cập nhật ngay, không chờ render) + hàng đợi giữ hàng theo từng sản phẩm
+    const cartRef = useRef<CartItem[]>(cart);
+    const holdQueue = useRef<Record<number, Promise<void>>>({});
+
     // 2. EFFECTS: TỰ ĐỘNG LƯU KHI STATE THAY ĐỔI
     
     useEffect(() => {
@@ -60,17 +74,49 @@ export const StoreProvider: React.FC<{children: React.ReactNode}> = ({ children
 
     // 3. LOGIC CART (GIỎ HÀNG)
     
-    const addToCart = (product: Product, quantity: number = 1) => {
-        setCart(prev => {
-            const exist = prev.find(item => item.id === product.id);
-            if (exist) {
-                // Nếu sản phẩm đã có -> Cộng dồn số lượng
+    // Giữ hàng trên server trước khi đổi giỏ. Trả về false nếu hết hàng (409).
+    // Lỗi mạng khác thì vẫn cho thêm vào giỏ, lúc đặt hàng server sẽ kiểm tra lại.
+    const holdStock = async (product: { id: number, name: string }, qty: number) => {
+        try {
+            await reserveStock(cartId, product.id, qty);
+            return true;
+        } catch (err: any) {
+            if (err.response?.status !== 409) return true;
+            Toastify({ 
+                text: err.response?.data?.detail || `${product.name} không đủ hàng!`, 
+                style: { background: "#EF4444" } 
+            }).showToast();
+            return false;
+        }
+    };
+
+    const commitCart = (update: (prev: CartItem[]) => CartItem[]) => {
+        cartRef.current = update(cartRef.current);
+        setCart(cartRef.current);
+    };
+
+    // Các lần bấm trên cùng 1 sản phẩm chạy lần lượt: lần sau tính trên giỏ đã có kết quả
+    // của lần trước, nên mỗi lần bấm đều được cộng và hold luôn khớp với giỏ.
+    const queueHold = (productId: number, task: () => Promise<void>) => {
+        const run = (holdQueue.current[productId] || Promise.resolve()).then(task);
+        holdQueue.current[productId] = run.catch(() => {});
+        return run;
+    };
+
+    // Số lượng mới tính 1 lần rồi dùng cho cả hold trên server lẫn state giỏ (gán tuyệt đối)
+    const addToCart = (product: Product, quantity: number = 1) => queueHold(product.id, async () => {
+        const newQty = (cartRef.current.find(item => item.id === product.id)?.qty || 0) + quantity;
+        if (!(await holdStock(product, newQty))) return;
+
+        commitCart(prev => {
+            if (prev.some(item => item.id === product.id)) {
+                // Nếu sản phẩm đã có -> Cập nhật số lượng
                 return prev.map(item => 
-                    item.id === product.id ? {...item, qty: item.qty + quantity} : item
+                    item.id === product.id ? {...item, qty: newQty} : item
                 );
             }
             // Nếu chưa có -> Thêm mới với số lượng chỉ định
-            return [...prev, { ...product, qty: quantity }];
+            return [...prev, { ...product, qty: newQty }];
         });
         
         // Hiển thị thông báo
@@ -81,26 +127,27 @@ export const StoreProvider: React.FC<{children: React.ReactNode}> = ({ children
             gravity: "bottom", 
             position: "right"
         }).showToast();
-    };
+    });
 
     const removeFromCart = (id: number) => {
-        setCart(prev => prev.filter(i => i.id !== id));
+        commitCart(prev => prev.filter(i => i.id !== id));
+        reserveStock(cartId, id, 0).catch(() => {});
     };
 
-    const updateQuantity = (id: number, change: number) => {
-        setCart(prev => prev.map(item => {
-            if (item.id === id) {
-                const newQty = item.qty + change;
-                // Không cho phép số lượng < 1 (Nếu muốn xóa thì dùng nút xóa riêng)
-                return newQty > 0 ? { ...item, qty: newQty } : item;
-            }
-            return item;
-        }));
-    };
+    const updateQuantity = (id: number, change: number) => queueHold(id, async () => {
+        const item = cartRef.current.find(i => i.id === id);
+        const newQty = (item?.qty || 0) + change;
+        // Không cho phép số lượng < 1 (Nếu muốn xóa thì dùng nút xóa riêng)
+        if (!item || newQty < 1) return;
+        if (!(await holdStock(item, newQty))) return;
+
+        commitCart(prev => prev.map(i => i.id === id ? { ...i, qty: newQty } : i));
+    });
 
     const clearCart = () => {
-        setCart([]);
+        commitCart(() => []);
         localStorage.removeItem('minephone_cart');
+        releaseCartStock(cartId).catch(() => {});
     };
 
     // Tính tổng tiền giỏ hàng (Computed Value)
@@ -158,7 +205,7 @@ export const StoreProvider: React.FC<{children: React.ReactNode}> = ({ children
     // 6. RENDER PROVIDER
     return (
         <StoreContext.Provider value={{ 
-            cart, addToCart, removeFromCart, updateQuantity, clearCart, cartTotal, 
+            cart, cartId, addToCart, removeFromCart, updateQuantity, clearCart, cartTotal, 
             user, login, logout,
             compareList, addToCompare, removeFromCompare
         }}>
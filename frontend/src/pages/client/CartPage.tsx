@@ -9,7 +9,7 @@ import { createOrder } from '../../api';
 import Toastify from 'toastify-js';
 
 const CartPage = () => {
-    const { cart, removeFromCart, updateQuantity, cartTotal, clearCart, user } = useStore();
+    const { cart, cartId, removeFromCart, updateQuantity, cartTotal, clearCart, user } = useStore();
     const navigate = useNavigate();
 
     // --- STATE FORM GIAO HÀNG ---
@@ -71,7 +71,8 @@ const CartPage = () => {
                     name: i.name, // <--- ĐÃ THÊM TRƯỜNG NÀY (Quan trọng)
                     price: i.price,
                     qty: i.qty
-                }))
+                })),
+                cart_id: cartId // Server bỏ giữ hàng của giỏ sau khi tạo đơn
             });
             
             clearCart();
@@ -6,6 +6,10 @@ import { getProducts, seedData } from '../../api';
 import type { Product } from '../../types';
 import ProductCard from '../../components/ProductCard';
 
+// Chỉ lấy các cột mà ProductCard hiển thị (kèm chip/ram/screen/battery cho nút So sánh).
+// Bỏ desc, quantity... -> payload lưới nhỏ hơn; trang chi tiết tự gọi getProductDetail.
+const GRID_FIELDS = ['id', 'name', 'brand', 'price', 'old_price', 'image', 'condition', 'chip', 'storage', 'ram', 'screen', 'battery'];
+
 const HomePage = () => {
     const navigate = useNavigate();
     const [products, setProducts] = useState<Product[]>([]);
@@ -26,7 +30,7 @@ const HomePage = () => {
             else if (priceRange === '10_20') { min = 10000000; max = 20000000; }
             else if (priceRange === 'over_20') { min = 20000000; }
 
-            const data = await getProducts(brand, search, min, max, sortBy);
+            const data = await getProducts(brand, search, min, max, sortBy, GRID_FIELDS);
             setProducts(data);
         } catch (error) { console.error(error); } 
         finally { setLoading(false); }
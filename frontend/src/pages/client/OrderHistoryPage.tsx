@@ -18,8 +18,8 @@ const OrderHistoryPage = () => {
         }
         const fetchOrders = async () => {
             try {
-                // Backend tự lọc theo user_id nếu client gọi
-                const data = await getOrders(user.id);
+                // Backend tự lọc theo user_id nếu client gọi (kèm cả đơn cũ đã lưu trữ)
+                const data = await getOrders(user.id, undefined, true);
                 setOrders(data);
             } catch (error) {
                 console.error("Lỗi tải lịch sử đơn hàng");